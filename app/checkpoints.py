@@ -0,0 +1,99 @@
+from app.utils import get_db_connection
+
+# Per-chunk checkpoints for upload jobs in upload_checkpoints. A start marker
+# (chunk_index START) is committed once the job has passed the duplicate
+# check; after that every chunk's checkpoint is inserted in the same
+# transaction as the chunk's rows, so the latest checkpoint always matches
+# what is committed in tweets. A retried job (or a re-upload of the same file
+# and month after a failure) resumes after the latest checkpoint.
+START = -1
+
+LATEST_SQL = """
+    SELECT chunk_index, rows_done, last_tweet_id, export_offset
+    FROM upload_checkpoints
+    WHERE job_id = %s
+    ORDER BY chunk_index DESC
+    LIMIT 1
+"""
+
+
+def mark_started(job_id):
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """INSERT IGNORE INTO upload_checkpoints (job_id, chunk_index, rows_done, last_tweet_id, export_offset)
+               VALUES (%s, %s, 0, 0, 0)""",
+            (job_id, START)
+        )
+        conn.commit()
+        cursor.close()
+
+
+def save_checkpoint(cursor, job_id, chunk_index, rows_done, last_tweet_id, export_offset):
+    """Record a committed chunk using the writer's cursor/transaction."""
+    cursor.execute(
+        """INSERT INTO upload_checkpoints (job_id, chunk_index, rows_done, last_tweet_id, export_offset)
+           VALUES (%s, %s, %s, %s, %s)""",
+        (job_id, chunk_index, rows_done, last_tweet_id, export_offset)
+    )
+
+
+def resume_point(job_id, file_name, month):
+    """
+    Return the checkpoint to resume from as a dict (chunks_done, rows_done,
+    last_tweet_id, export_offset), or None if this upload starts fresh.
+    Checkpoints of an earlier failed job for the same file and month are
+    taken over when that job is the latest one for the file.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(LATEST_SQL, (job_id,))
+        latest = cursor.fetchone()
+
+        if latest is None:
+            cursor.execute(
+                """SELECT job_id, status FROM upload_jobs
+                   WHERE file_name = %s AND month = %s AND job_id != %s
+                   ORDER BY created_at DESC
+                   LIMIT 1""",
+                (file_name, month, job_id)
+            )
+            previous = cursor.fetchone()
+            if previous and previous["status"] == "failed":
+                cursor.execute(LATEST_SQL, (previous["job_id"],))
+                latest = cursor.fetchone()
+                if latest is not None:
+                    cursor.execute(
+                        "UPDATE upload_checkpoints SET job_id = %s WHERE job_id = %s",
+                        (job_id, previous["job_id"])
+                    )
+                    conn.commit()
+                    print(f"🔁 Job {job_id} takes over checkpoints of failed job {previous['job_id']}")
+
+        cursor.close()
+    if latest is None:
+        return None
+    return {
+        "chunks_done": latest["chunk_index"] + 1,
+        "rows_done": latest["rows_done"],
+        "last_tweet_id": latest["last_tweet_id"],
+        "export_offset": latest["export_offset"],
+    }
+
+
+def discard_uncommitted(file_name, month, last_tweet_id):
+    """
+    Delete rows of this file above the checkpoint. Writers may commit part of
+    a chunk before its checkpoint; those rows have no aggregates or hate-type
+    links yet and are re-inserted when the chunk is redone.
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "DELETE FROM tweets WHERE file_name = %s AND month = %s AND tweet_id > %s",
+            (file_name, month, last_tweet_id)
+        )
+        deleted = cursor.rowcount
+        conn.commit()
+        cursor.close()
+    return deleted
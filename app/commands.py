@@ -0,0 +1,123 @@
+import click
+import pandas as pd
+
+# Gold label spellings accepted by check-parity (after strip + lowercase)
+GOLD_LABELS = {
+    "hate": 1, "1": 1, "1.0": 1,
+    "non-hate": 0, "non_hate": 0, "nonhate": 0, "0": 0, "0.0": 0,
+}
+
+
+def _read_texts(csv_path):
+    df = pd.read_csv(csv_path, encoding_errors="ignore", on_bad_lines="skip")
+    if "text" in df.columns:
+        return df, df["text"].astype(str).tolist()
+    if "tweet" in df.columns:
+        return df, df["tweet"].astype(str).tolist()
+    raise click.ClickException("CSV must have a 'text' or 'tweet' column.")
+
+
+def register_commands(app):
+    """Register maintenance commands, e.g. `flask --app run quantize-models`."""
+
+    @app.cli.command("quantize-models")
+    def quantize_models():
+        """Quantize Stage 1 and Stage 2 to int8 and cache them on disk."""
+        from app.stage_predict import quantize_model, STAGE1_DIR, STAGE2_DIR
+
+        for model_dir in (STAGE1_DIR, STAGE2_DIR):
+            quantize_model(model_dir)
+            click.echo(f"Quantized {model_dir}")
+
+    @app.cli.command("export-onnx")
+    @click.option("--opset", default=17, show_default=True)
+    def export_onnx_models(opset):
+        """Export Stage 1 and Stage 2 to ONNX for INFERENCE_BACKEND=onnx."""
+        from app.stage_predict import export_onnx, STAGE1_DIR, STAGE2_DIR
+
+        for model_dir in (STAGE1_DIR, STAGE2_DIR):
+            path = export_onnx(model_dir, opset=opset)
+            click.echo(f"Exported {path}")
+
+    @app.cli.command("check-parity")
+    @click.argument("csv_path", type=click.Path(exists=True))
+    @click.option("--backend", default="int8", show_default=True, help="Backend to compare against float32 PyTorch.")
+    @click.option("--batch-size", default=64, show_default=True)
+    def check_parity(csv_path, backend, batch_size):
+        """Report agreement between a backend and the float32 models on a held-out CSV."""
+        from app.stage_predict import compare_backends
+
+        df, texts = _read_texts(csv_path)
+        result = compare_backends(texts, backend, reference="torch", batch_size=batch_size)
+
+        click.echo(f"Rows:                {result['rows']}")
+        click.echo(f"Stage 1 agreement:   {result['stage1_agreement']:.2%}")
+        click.echo(f"Stage 2 agreement:   {result['stage2_agreement']:.2%} (rows both call hate)")
+        click.echo(f"Hate count (torch):  {result['reference_hate']}")
+        click.echo(f"Hate count ({backend}): {result['backend_hate']}")
+
+        # Optional gold labels (0/1 or hate/non-hate) give an accuracy for each side
+        if "label" in df.columns:
+            gold = df["label"].astype(str).str.strip().str.lower().map(GOLD_LABELS).tolist()
+            skipped = sum(1 for g in gold if pd.isna(g))
+            if skipped:
+                click.echo(f"Skipped {skipped} rows with a missing or unknown label")
+            for name, preds in (("torch", result["reference_preds"]), (backend, result["backend_preds"])):
+                pairs = [(int(g), p) for g, p in zip(gold, preds) if not pd.isna(g)]
+                acc = sum(1 for g, p in pairs if g == p) / len(pairs) if pairs else 0
+                click.echo(f"Accuracy ({name}):    {acc:.2%}")
+
+    @app.cli.command("clear-prediction-cache")
+    @click.option("--stale-days", type=float, default=None,
+                  help="Only delete results of model versions unused for this many days.")
+    def clear_prediction_cache(stale_days):
+        """Delete cached classification results (all of them by default)."""
+        from app import prediction_cache
+
+        if stale_days is not None:
+            deleted = prediction_cache.purge_stale(stale_days)
+            click.echo(f"Deleted {deleted} stale results from {prediction_cache.CACHE_PATH}")
+            return
+        prediction_cache.clear()
+        click.echo(f"Cleared {prediction_cache.CACHE_PATH}")
+
+    @app.cli.command("rebuild-monthly-stats")
+    def rebuild_monthly_stats():
+        """Recompute tweet_monthly_stats from every row in tweets."""
+        from app.tweet_stats import rebuild_stats, RebuildConflict
+
+        try:
+            keys = rebuild_stats()
+        except RebuildConflict as e:
+            raise click.ClickException(str(e))
+        click.echo(f"Rebuilt tweet_monthly_stats ({keys} rows)")
+
+    @app.cli.command("backfill-hate-types")
+    @click.option("--batch-size", default=50_000, show_default=True)
+    def backfill_hate_types(batch_size):
+        """Populate tweet_hate_type from the comma-joined tweets.hate_types column."""
+        from app.hate_types import backfill
+
+        linked = backfill(batch_size=batch_size)
+        click.echo(f"Linked {linked} tweet/hate-type pairs")
+
+    @app.cli.command("rebuild-word-counts")
+    def rebuild_word_counts_command():
+        """Recompute the per-month word and hate-type keyword counts."""
+        from app.tweet_stats import RebuildConflict
+        from app.word_counts import rebuild_word_counts
+
+        try:
+            n = rebuild_word_counts()
+        except RebuildConflict as e:
+            raise click.ClickException(str(e))
+        click.echo(f"Rebuilt tweet_word_counts and hate_type_word_counts ({n} rows)")
+
+    @app.cli.command("backfill-scores")
+    @click.option("--batch-size", default=5000, show_default=True)
+    def backfill_scores(batch_size):
+        """Store model scores for tweets classified before they were kept."""
+        from app.scores import backfill
+
+        n = backfill(batch_size=batch_size)
+        click.echo(f"Stored scores for {n} tweets")
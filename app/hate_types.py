@@ -0,0 +1,73 @@
+from app.utils import get_db_connection
+from app.tweet_stats import split_types
+
+# Normalized hate-type storage: hate_type holds one row per (lowercased) type
+# name and tweet_hate_type links tweets to their types, so dashboards can
+# filter and group by type in SQL instead of re-parsing tweets.hate_types.
+# The comma-joined column is kept for the CSV export and older readers.
+
+LINK_SQL = """
+    INSERT IGNORE INTO tweet_hate_type (tweet_id, type_id)
+    SELECT t.tweet_id, ht.type_id
+    FROM tweets t
+    JOIN hate_type ht ON FIND_IN_SET(ht.type_name, LOWER(REPLACE(t.hate_types, ' ', ''))) > 0
+    WHERE t.hate = 'hate' AND {where}
+"""
+
+
+def ensure_types(cursor, names):
+    names = sorted({n for n in names if n})
+    if names:
+        cursor.executemany("INSERT IGNORE INTO hate_type (type_name) VALUES (%s)", [(n,) for n in names])
+
+
+def link_new_rows(cursor, file_name, month, after_id, type_names):
+    """
+    Link rows of one uploaded file with tweet_id > after_id to their hate
+    types, inside the caller's transaction. Returns the new watermark id.
+    """
+    ensure_types(cursor, type_names)
+    cursor.execute(
+        LINK_SQL.format(where="t.file_name = %s AND t.month = %s AND t.tweet_id > %s"),
+        (file_name, month, after_id)
+    )
+    cursor.execute(
+        "SELECT COALESCE(MAX(tweet_id), 0) FROM tweets WHERE file_name = %s AND month = %s",
+        (file_name, month)
+    )
+    return cursor.fetchone()[0]
+
+
+def backfill(batch_size=50_000):
+    """Populate hate_type / tweet_hate_type for tweets already in the database."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute("SELECT DISTINCT hate_types FROM tweets WHERE hate = 'hate'")
+        names = set()
+        for (value,) in cursor.fetchall():
+            names.update(split_types(value))
+        ensure_types(cursor, names)
+        conn.commit()
+
+        cursor.execute("SELECT COALESCE(MIN(tweet_id), 0), COALESCE(MAX(tweet_id), 0) FROM tweets")
+        low, high = cursor.fetchone()
+        linked = 0
+        for start in range(low, high + 1, batch_size):
+            cursor.execute(
+                LINK_SQL.format(where="t.tweet_id BETWEEN %s AND %s"),
+                (start, start + batch_size - 1)
+            )
+            linked += cursor.rowcount
+            conn.commit()
+
+        cursor.close()
+    return linked
+
+
+def type_filter_sql(alias="t"):
+    """SQL fragment restricting `alias` to tweets tagged with a hate type name (%s)."""
+    return (
+        f"EXISTS (SELECT 1 FROM tweet_hate_type x JOIN hate_type ht ON ht.type_id = x.type_id "
+        f"WHERE x.tweet_id = {alias}.tweet_id AND ht.type_name = %s)"
+    )
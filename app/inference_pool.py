@@ -0,0 +1,157 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app import prediction_cache
+
+# Optional inference server mode: INFERENCE_WORKERS processes, each running
+# predict_toxic_and_hate_type with INFERENCE_THREADS_PER_WORKER intra-op
+# threads (default: cores / workers) on its own copy of the model graph. Float
+# weights are memory-mapped from model.safetensors (INFERENCE_MMAP_WEIGHTS),
+# so N workers share one set of weight pages instead of N private copies.
+# Large requests are split into shards so all workers run in parallel; with
+# INFERENCE_WORKERS=0 (default) everything runs in the calling thread as before.
+# Workers look up the prediction cache themselves; each shard reports its hits
+# and misses back so prediction_cache.get_stats() in this process covers them.
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", "0"))
+INFERENCE_THREADS_PER_WORKER = int(os.environ.get("INFERENCE_THREADS_PER_WORKER", "0"))
+INFERENCE_PIN_CPUS = os.environ.get("INFERENCE_PIN_CPUS") == "1"
+SHARD_SIZE = int(os.environ.get("INFERENCE_SHARD_SIZE", "512"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _threads_per_worker():
+    if INFERENCE_THREADS_PER_WORKER > 0:
+        return INFERENCE_THREADS_PER_WORKER
+    return max(1, (os.cpu_count() or 1) // max(INFERENCE_WORKERS, 1))
+
+
+def _init_worker(threads, counter):
+    # Runs once in each spawned worker before it takes any work
+    with counter.get_lock():
+        index = counter.value
+        counter.value += 1
+    if INFERENCE_PIN_CPUS and hasattr(os, "sched_setaffinity"):
+        cpus = os.cpu_count() or 1
+        os.sched_setaffinity(0, {(index * threads + i) % cpus for i in range(threads)})
+
+    os.environ.setdefault("INFERENCE_MMAP_WEIGHTS", "1")
+    os.environ.setdefault("ORT_INTRA_OP_THREADS", str(threads))
+    import torch
+
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+    from app.stage_predict import warm_up
+    warm_up()
+    print(f"🧠 Inference worker {index} ready (pid {os.getpid()}, {threads} threads)")
+
+
+def _predict_shard(texts, batch_size, return_scores):
+    """Returns (result, cache hits, cache misses) for one shard."""
+    from app import prediction_cache
+    from app.stage_predict import predict_toxic_and_hate_type
+
+    # A worker runs one shard at a time, so the difference is this shard's
+    hits, misses = prediction_cache.stats["hits"], prediction_cache.stats["misses"]
+    result = predict_toxic_and_hate_type(texts, batch_size=batch_size, return_scores=return_scores)
+    return result, prediction_cache.stats["hits"] - hits, prediction_cache.stats["misses"] - misses
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: forking a process that already runs torch/DB threads is unsafe
+            ctx = multiprocessing.get_context("spawn")
+            threads = _threads_per_worker()
+            _executor = ProcessPoolExecutor(
+                max_workers=INFERENCE_WORKERS,
+                mp_context=ctx,
+                initializer=_init_worker,
+                initargs=(threads, ctx.Value("i", 0)),
+            )
+            print(f"🧠 Starting {INFERENCE_WORKERS} inference workers x {threads} threads")
+        return _executor
+
+
+def _reset_executor(broken):
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _merge(parts, return_scores):
+    preds, hate_type_dict, cleaned, scores = [], {}, [], []
+    for part in parts:
+        offset = len(preds)
+        preds.extend(part[0])
+        hate_type_dict.update({offset + i: types for i, types in part[1].items()})
+        cleaned.extend(part[2])
+        if return_scores:
+            scores.extend(part[3])
+    if return_scores:
+        return preds, hate_type_dict, cleaned, scores
+    return preds, hate_type_dict, cleaned
+
+
+def submit(texts, batch_size=32, return_scores=False):
+    """
+    Classify `texts` on the worker pool without blocking. Returns a Future
+    whose result matches predict_toxic_and_hate_type(texts, ...).
+    """
+    executor = _get_executor()
+    shards = [texts[i:i + SHARD_SIZE] for i in range(0, len(texts), SHARD_SIZE)] or [[]]
+    try:
+        futures = [executor.submit(_predict_shard, shard, batch_size, return_scores) for shard in shards]
+    except BrokenProcessPool:
+        _reset_executor(executor)
+        raise
+
+    result = Future()
+    remaining = [len(futures)]
+    lock = threading.Lock()
+
+    def done(_):
+        with lock:
+            remaining[0] -= 1
+            if remaining[0]:
+                return
+        try:
+            parts = [f.result() for f in futures]
+            prediction_cache.record_lookups(sum(p[1] for p in parts), sum(p[2] for p in parts))
+            result.set_result(_merge([p[0] for p in parts], return_scores))
+        except BrokenProcessPool as e:
+            _reset_executor(executor)
+            result.set_exception(e)
+        except Exception as e:
+            result.set_exception(e)
+
+    for f in futures:
+        f.add_done_callback(done)
+    return result
+
+
+def predict(texts, batch_size=32, return_scores=False):
+    """
+    predict_toxic_and_hate_type, run on the worker pool when INFERENCE_WORKERS
+    is set and in the calling thread otherwise.
+    """
+    if INFERENCE_WORKERS > 0:
+        return submit(texts, batch_size, return_scores).result()
+    from app.stage_predict import predict_toxic_and_hate_type
+    return predict_toxic_and_hate_type(texts, batch_size=batch_size, return_scores=return_scores)
+
+
+def shutdown():
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,233 @@
+import itertools
+import os
+import queue
+import socket
+import threading
+import uuid
+from datetime import datetime
+
+from app.utils import get_db_connection
+
+# Upload jobs run on a fixed pool of worker threads fed from a priority queue
+# (lower number first, FIFO within a priority). Job state is persisted in the
+# upload_jobs table so it survives restarts and is visible to every process.
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+DEFAULT_PRIORITY = 5
+MIN_PRIORITY, MAX_PRIORITY = 0, 9  # upload_jobs.priority is a TINYINT
+
+_queue = queue.PriorityQueue()
+_sequence = itertools.count()
+_tasks = {}
+_workers = []
+_start_lock = threading.Lock()
+_app = None
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _now():
+    return datetime.now()
+
+
+def _update_job(job_id, **fields):
+    assignments = ", ".join(f"{col} = %s" for col in fields)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"UPDATE upload_jobs SET {assignments} WHERE job_id = %s", list(fields.values()) + [job_id])
+        conn.commit()
+        cursor.close()
+
+
+def get_job(job_id):
+    with get_db_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT * FROM upload_jobs WHERE job_id = %s", (job_id,))
+        job = cursor.fetchone()
+        cursor.close()
+    return job
+
+
+def list_jobs(limit=50):
+    with get_db_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT * FROM upload_jobs ORDER BY created_at DESC LIMIT %s", (limit,))
+        jobs = cursor.fetchall()
+        cursor.close()
+    return jobs
+
+
+def uploads_active(since=None):
+    """True if a job is running or, with `since`, any job has started since then."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        if since is None:
+            cursor.execute("SELECT COUNT(*) FROM upload_jobs WHERE status = %s", (RUNNING,))
+        else:
+            cursor.execute(
+                "SELECT COUNT(*) FROM upload_jobs WHERE status = %s OR started_at >= %s",
+                (RUNNING, since)
+            )
+        (count,) = cursor.fetchone()
+        cursor.close()
+    return count > 0
+
+
+def register_task(name, func):
+    """Register a callable that workers can run as func(job_id, file_path, month, file_name)."""
+    _tasks[name] = func
+
+
+def submit_job(task, file_path, month, file_name, priority=DEFAULT_PRIORITY):
+    """
+    Persist a queued job and hand it to the worker pool. Returns the job ID.
+    Priorities outside MIN_PRIORITY..MAX_PRIORITY are clamped to that range.
+    """
+    priority = min(max(int(priority), MIN_PRIORITY), MAX_PRIORITY)
+    job_id = uuid.uuid4().hex
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """INSERT INTO upload_jobs (job_id, task, file_path, file_name, month, priority, status)
+               VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+            (job_id, task, file_path, file_name, month, priority, QUEUED)
+        )
+        conn.commit()
+        cursor.close()
+
+    _queue.put((priority, next(_sequence), job_id))
+    return job_id
+
+
+def retry_job(job_id):
+    """Re-queue a failed job; upload jobs resume from their last checkpoint. Returns False if not failed."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(
+            "UPDATE upload_jobs SET status = %s, percent = 0, message = %s, finished_at = NULL WHERE job_id = %s AND status = %s",
+            (QUEUED, "Queued for retry", job_id, FAILED)
+        )
+        retried = cursor.rowcount == 1
+        conn.commit()
+        if retried:
+            cursor.execute("SELECT priority FROM upload_jobs WHERE job_id = %s", (job_id,))
+            _queue.put((cursor.fetchone()["priority"], next(_sequence), job_id))
+        cursor.close()
+    return retried
+
+
+def _claim_job(job_id):
+    # Atomic queued -> running transition, so a job that was queued in more than
+    # one process (e.g. after recovery) only ever runs once
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "UPDATE upload_jobs SET status = %s, worker = %s, started_at = %s WHERE job_id = %s AND status = %s",
+            (RUNNING, WORKER_ID, _now(), job_id, QUEUED)
+        )
+        claimed = cursor.rowcount == 1
+        conn.commit()
+        cursor.close()
+    return claimed
+
+
+def _run_job(job_id):
+    if not _claim_job(job_id):
+        return
+    job = get_job(job_id)
+    func = _tasks.get(job["task"])
+    if func is None:
+        _update_job(job_id, status=FAILED, percent=100, message=f"Unknown task '{job['task']}'", finished_at=_now())
+        return
+
+    try:
+        func(job_id, job["file_path"], job["month"], job["file_name"])
+        _update_job(job_id, status=DONE, percent=100, finished_at=_now())
+    except Exception as e:
+        print(f"❌ Job {job_id} failed:", e)
+        _update_job(job_id, status=FAILED, percent=100, message=f"❌ Failed: {e}"[:1000], finished_at=_now())
+
+
+def _worker_loop():
+    while True:
+        _, _, job_id = _queue.get()
+        try:
+            with _app.app_context():
+                _run_job(job_id)
+        except Exception as e:
+            print(f"❌ Job worker error ({job_id}):", e)
+        finally:
+            _queue.task_done()
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _recover_jobs():
+    """
+    Re-queue jobs left queued by a previous process, and jobs that were
+    running in a process on this host that no longer exists (they resume
+    from their last checkpoint).
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT job_id, worker FROM upload_jobs WHERE status = %s", (RUNNING,))
+        host = socket.gethostname()
+        for row in cursor.fetchall():
+            worker_host, _, pid = (row["worker"] or "").rpartition(":")
+            if worker_host == host and pid.isdigit() and not _pid_alive(int(pid)):
+                cursor.execute(
+                    "UPDATE upload_jobs SET status = %s, message = %s WHERE job_id = %s",
+                    (QUEUED, "Interrupted by server restart, resuming", row["job_id"])
+                )
+        conn.commit()
+        cursor.execute(
+            "SELECT job_id, priority FROM upload_jobs WHERE status = %s ORDER BY created_at",
+            (QUEUED,)
+        )
+        for row in cursor.fetchall():
+            _queue.put((row["priority"], next(_sequence), row["job_id"]))
+        cursor.close()
+
+
+def init_job_queue(app):
+    """Start the bounded worker pool (UPLOAD_WORKERS threads) for this process."""
+    global _app
+    with _start_lock:
+        if _workers:
+            return
+        _app = app
+        _start_workers(app)
+
+
+def register_job_queue(app):
+    """
+    Start the workers with the first request this process serves, so CLI
+    commands that import the app never pick up queued jobs.
+    """
+    @app.before_request
+    def _ensure_job_workers():
+        if not _workers:
+            init_job_queue(app)
+
+
+def _start_workers(app):
+    with app.app_context():
+        try:
+            _recover_jobs()
+        except Exception as e:
+            print("⚠️ Could not recover upload jobs:", e)
+
+    for i in range(app.config.get("UPLOAD_WORKERS", 1)):
+        t = threading.Thread(target=_worker_loop, name=f"upload-worker-{i}", daemon=True)
+        t.start()
+        _workers.append(t)
+
+
+def queue_depth():
+    return _queue.qsize()
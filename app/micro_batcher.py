@@ -0,0 +1,185 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+# Coalesces concurrent classification requests into shared model batches.
+# Callers block in classify() while a single dispatcher thread gathers queued
+# requests until max_batch_size texts are waiting or the oldest has waited
+# max_wait_ms, runs them through predict_toxic_and_hate_type as one batch (on
+# the inference worker pool when one is configured) and hands each caller its
+# own slice of the results. With a worker pool, at most
+# IN_FLIGHT_PER_WORKER batches per worker are handed over at a time; beyond
+# that the dispatcher waits, so requests keep queueing here (coalescing into
+# larger batches) and max_queue still applies.
+IN_FLIGHT_PER_WORKER = 2
+
+
+class QueueFull(Exception):
+    pass
+
+
+class _Request:
+    __slots__ = ("texts", "future", "enqueued")
+
+    def __init__(self, texts):
+        self.texts = texts
+        self.future = Future()
+        self.enqueued = time.perf_counter()
+
+
+class MicroBatcher:
+    def __init__(self, max_batch_size=64, max_wait_ms=10, max_queue=1000):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._in_flight = None
+        self.stats = {
+            "requests": 0,
+            "texts": 0,
+            "batches": 0,
+            "rejected": 0,
+            "batch_size_histogram": {},
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+        }
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="classify-batcher", daemon=True)
+                self._thread.start()
+
+    def classify(self, texts, timeout=None):
+        """
+        Classify `texts` as part of a shared batch. Returns
+        (preds, hate_type_dict, scores) for these texts only, in order.
+        Raises QueueFull when max_queue requests are already waiting.
+        """
+        if not texts:
+            return [], {}, []
+        self._ensure_thread()
+        req = _Request(list(texts))
+        try:
+            self._queue.put_nowait(req)
+        except queue.Full:
+            with self._lock:
+                self.stats["rejected"] += 1
+            raise QueueFull(f"{self._queue.maxsize} classification requests already queued")
+        return req.future.result(timeout=timeout)
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        size = len(batch[0].texts)
+        deadline = batch[0].enqueued + self.max_wait
+        while size < self.max_batch_size:
+            # Past the deadline, still take requests that are already waiting
+            remaining = deadline - time.perf_counter()
+            try:
+                req = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(req)
+            size += len(req.texts)
+        return batch, size
+
+    def _run(self):
+        from app import inference_pool
+
+        if inference_pool.INFERENCE_WORKERS > 0:
+            self._in_flight = threading.BoundedSemaphore(inference_pool.INFERENCE_WORKERS * IN_FLIGHT_PER_WORKER)
+
+        while True:
+            if self._in_flight is not None:
+                # Wait for a free worker slot before collecting, so requests
+                # arriving meanwhile join the next batch
+                self._in_flight.acquire()
+            batch, size = self._collect()
+            started = time.perf_counter()
+            self._record(batch, size, started)
+            texts = [t for req in batch for t in req.texts]
+            if self._in_flight is None:
+                try:
+                    self._deliver(batch, inference_pool.predict(texts, return_scores=True))
+                except Exception as e:
+                    self._fail(batch, e)
+                continue
+
+            try:
+                future = inference_pool.submit(texts, return_scores=True)
+            except Exception as e:
+                self._in_flight.release()
+                self._fail(batch, e)
+                continue
+            future.add_done_callback(lambda f, batch=batch: self._finish(batch, f))
+
+    def _finish(self, batch, future):
+        # Runs as a future callback, where exceptions would be swallowed
+        try:
+            self._deliver(batch, future.result())
+        except Exception as e:
+            self._fail(batch, e)
+        finally:
+            self._in_flight.release()
+
+    def _fail(self, batch, error):
+        for req in batch:
+            if not req.future.done():
+                req.future.set_exception(error)
+
+    def _deliver(self, batch, result):
+        preds, hate_type_dict, _, scores = result
+        offset = 0
+        for req in batch:
+            n = len(req.texts)
+            types = {i - offset: hate_type_dict[i] for i in range(offset, offset + n) if i in hate_type_dict}
+            req.future.set_result((preds[offset:offset + n], types, scores[offset:offset + n]))
+            offset += n
+
+    def _record(self, batch, size, started):
+        # Histogram buckets are powers of two: "1", "2", "4", ... (upper bound)
+        bucket = 1
+        while bucket < size:
+            bucket *= 2
+        with self._lock:
+            s = self.stats
+            s["requests"] += len(batch)
+            s["texts"] += size
+            s["batches"] += 1
+            s["batch_size_histogram"][str(bucket)] = s["batch_size_histogram"].get(str(bucket), 0) + 1
+            for req in batch:
+                wait_ms = (started - req.enqueued) * 1000
+                s["wait_ms_total"] += wait_ms
+                s["wait_ms_max"] = max(s["wait_ms_max"], wait_ms)
+
+    def get_stats(self):
+        with self._lock:
+            s = dict(self.stats)
+            s["batch_size_histogram"] = dict(s["batch_size_histogram"])
+        s["queue_depth"] = self._queue.qsize()
+        s["max_batch_size"] = self.max_batch_size
+        s["max_wait_ms"] = self.max_wait * 1000
+        s["avg_batch_size"] = round(s["texts"] / s["batches"], 2) if s["batches"] else 0.0
+        s["avg_wait_ms"] = round(s["wait_ms_total"] / s["requests"], 3) if s["requests"] else 0.0
+        s["wait_ms_total"] = round(s["wait_ms_total"], 3)
+        s["wait_ms_max"] = round(s["wait_ms_max"], 3)
+        return s
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_batcher(config):
+    """Process-wide batcher configured from CLASSIFY_MAX_BATCH / CLASSIFY_MAX_WAIT_MS / CLASSIFY_MAX_QUEUE."""
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = MicroBatcher(
+                max_batch_size=config.get("CLASSIFY_MAX_BATCH", 64),
+                max_wait_ms=config.get("CLASSIFY_MAX_WAIT_MS", 10),
+                max_queue=config.get("CLASSIFY_MAX_QUEUE", 1000),
+            )
+    return _batcher
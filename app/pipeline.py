@@ -0,0 +1,90 @@
+import queue
+import threading
+
+# Small staged pipeline used by the upload job: each stage runs in its own
+# thread and hands items to the next through a bounded queue, so CSV parsing,
+# model inference and DB inserts for different chunks overlap. A full queue
+# blocks the stage before it (backpressure); the first exception in any stage
+# stops the others and is re-raised to the caller.
+
+_END = object()
+POLL_SECONDS = 0.2
+
+
+class PipelineStopped(Exception):
+    pass
+
+
+def run_pipeline(source, stages, queue_size=2, app=None):
+    """
+    Feed items from the iterable `source` through `stages`, a list of
+    (name, func) pairs. Each func takes an item and returns the item for
+    the next stage; the last stage's return value is discarded.
+    If `app` is given, every stage thread runs inside its app context.
+    """
+    queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+    stop = threading.Event()
+    errors = []
+
+    def put(q, item):
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=POLL_SECONDS)
+                return
+            except queue.Full:
+                continue
+        raise PipelineStopped()
+
+    def get(q):
+        while not stop.is_set():
+            try:
+                return q.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                continue
+        raise PipelineStopped()
+
+    def guarded(name, body):
+        def target():
+            try:
+                if app is not None:
+                    with app.app_context():
+                        body()
+                else:
+                    body()
+            except PipelineStopped:
+                pass
+            except Exception as e:
+                errors.append((name, e))
+                stop.set()
+        return threading.Thread(target=target, name=f"pipeline-{name}", daemon=True)
+
+    def read():
+        for item in source:
+            put(queues[0], item)
+        put(queues[0], _END)
+
+    def make_stage(i, func):
+        def work():
+            out = queues[i + 1] if i + 1 < len(stages) else None
+            while True:
+                item = get(queues[i])
+                if item is _END:
+                    if out is not None:
+                        put(out, _END)
+                    return
+                result = func(item)
+                if out is not None:
+                    put(out, result)
+        return work
+
+    threads = [guarded("read", read)]
+    threads += [guarded(name, make_stage(i, func)) for i, (name, func) in enumerate(stages)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    if errors:
+        name, error = errors[0]
+        print(f"❌ Pipeline stage '{name}' failed:", error)
+        raise error
@@ -0,0 +1,176 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Content-addressed cache of classification results, keyed by a hash of the
+# preprocessed tweet and a fingerprint of the models that produced it.
+# Stored in a local SQLite file so it survives restarts and is shared by
+# every worker on the same machine. Several model versions (e.g. the torch,
+# int8 and onnx backends) can be in use at once, so results are only evicted
+# once no process has used their version for STALE_DAYS.
+CACHE_ENABLED = os.environ.get("PREDICTION_CACHE", "1") != "0"
+CACHE_PATH = os.environ.get("PREDICTION_CACHE_PATH", os.path.join("cache", "predictions.sqlite3"))
+LOOKUP_CHUNK = 500  # stay well below SQLite's bound-parameter limit
+STALE_DAYS = float(os.environ.get("PREDICTION_CACHE_STALE_DAYS", "30"))
+TOUCH_INTERVAL = 3600  # seconds between last_used updates for a version in use
+
+_lock = threading.Lock()
+_conn: Optional[sqlite3.Connection] = None
+_touched: Dict[str, float] = {}
+
+stats = {"hits": 0, "misses": 0}
+
+
+def text_key(clean_text: str) -> str:
+    return hashlib.sha1(clean_text.encode("utf-8")).hexdigest()
+
+
+def model_fingerprint(paths: List[str], backend: str, extra: str = "") -> str:
+    """
+    Hash of the backend plus name, size and mtime of the given model files.
+    Retraining or replacing a model changes the fingerprint, which
+    invalidates its cached results.
+    """
+    h = hashlib.sha1(backend.encode("utf-8"))
+    for path in sorted(paths):
+        if os.path.isfile(path):
+            st = os.stat(path)
+            h.update(f"{path}:{st.st_size}:{int(st.st_mtime)}".encode("utf-8"))
+    h.update(extra.encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def _get_conn() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        folder = os.path.dirname(CACHE_PATH)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        _conn = sqlite3.connect(CACHE_PATH, check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        tracked = _conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'model_versions'"
+        ).fetchone()
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS predictions (
+                text_key TEXT NOT NULL,
+                model_version TEXT NOT NULL,
+                result TEXT NOT NULL,
+                PRIMARY KEY (text_key, model_version)
+            )
+        """)
+        _conn.execute("""
+            CREATE TABLE IF NOT EXISTS model_versions (
+                model_version TEXT PRIMARY KEY,
+                last_used INTEGER NOT NULL
+            )
+        """)
+        if not tracked:
+            # Versions cached before last_used was tracked start their age now
+            _conn.execute(
+                "INSERT OR IGNORE INTO model_versions SELECT DISTINCT model_version, ? FROM predictions",
+                (int(time.time()),)
+            )
+        _conn.commit()
+    return _conn
+
+
+def _delete_stale(conn: sqlite3.Connection, max_age_days: float) -> int:
+    cutoff = int(time.time() - max_age_days * 86400)
+    stale = [v for (v,) in conn.execute("SELECT model_version FROM model_versions WHERE last_used < ?", (cutoff,))]
+    deleted = 0
+    for version in stale:
+        deleted += conn.execute("DELETE FROM predictions WHERE model_version = ?", (version,)).rowcount
+        conn.execute("DELETE FROM model_versions WHERE model_version = ?", (version,))
+    return deleted
+
+
+def _touch_version(conn: sqlite3.Connection, version: str):
+    # Mark this version as in use (at most once per TOUCH_INTERVAL) and evict
+    # versions nobody has used for STALE_DAYS
+    now = time.time()
+    if now - _touched.get(version, 0) < TOUCH_INTERVAL:
+        return
+    conn.execute(
+        "INSERT OR REPLACE INTO model_versions (model_version, last_used) VALUES (?, ?)",
+        (version, int(now))
+    )
+    _delete_stale(conn, STALE_DAYS)
+    conn.commit()
+    _touched[version] = now
+
+
+def get_many(keys: List[str], version: str) -> Dict[str, dict]:
+    """Return cached results for the given keys; missing keys are left out."""
+    found: Dict[str, dict] = {}
+    with _lock:
+        conn = _get_conn()
+        _touch_version(conn, version)
+        for start in range(0, len(keys), LOOKUP_CHUNK):
+            part = keys[start:start + LOOKUP_CHUNK]
+            placeholders = ",".join(["?"] * len(part))
+            rows = conn.execute(
+                f"SELECT text_key, result FROM predictions WHERE model_version = ? AND text_key IN ({placeholders})",
+                [version] + part
+            ).fetchall()
+            for key, result in rows:
+                found[key] = json.loads(result)
+        _count(len(found), len(keys) - len(found))
+    return found
+
+
+def _count(hits: int, misses: int):
+    stats["hits"] += hits
+    stats["misses"] += misses
+
+
+def record_lookups(hits: int, misses: int):
+    """Add lookups done elsewhere (e.g. in an inference worker process) to the stats."""
+    with _lock:
+        _count(hits, misses)
+
+
+def put_many(results: Dict[str, dict], version: str):
+    if not results:
+        return
+    with _lock:
+        conn = _get_conn()
+        conn.executemany(
+            "INSERT OR REPLACE INTO predictions (text_key, model_version, result) VALUES (?, ?, ?)",
+            [(key, version, json.dumps(value)) for key, value in results.items()]
+        )
+        conn.commit()
+
+
+def get_stats() -> dict:
+    with _lock:
+        hits, misses = stats["hits"], stats["misses"]
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else 0.0,
+    }
+
+
+def purge_stale(max_age_days: float = STALE_DAYS) -> int:
+    """Delete results of model versions unused for max_age_days; returns rows deleted."""
+    with _lock:
+        conn = _get_conn()
+        deleted = _delete_stale(conn, max_age_days)
+        conn.commit()
+    return deleted
+
+
+def clear():
+    with _lock:
+        conn = _get_conn()
+        conn.execute("DELETE FROM predictions")
+        conn.execute("DELETE FROM model_versions")
+        conn.commit()
+        _touched.clear()
+        stats["hits"] = stats["misses"] = 0
@@ -0,0 +1,142 @@
+import gzip
+import importlib.util
+import os
+
+# Incremental writers for the processed-results file of an upload. Chunks are
+# appended as they are classified, so memory use does not grow with the file.
+# Output goes to "<name>.part" and is renamed into place by finish(), so a
+# download never sees a half-written file.
+#   csv     - plain UTF-8 CSV (default), header written once
+#   csv.gz  - the same CSV, one gzip member per chunk (a valid gzip stream)
+#   parquet - one row group per chunk, all columns stored as strings (needs pyarrow)
+EXPORT_FORMATS = ("csv", "csv.gz", "parquet")
+EXPORT_READ_SIZE = 64 * 1024
+
+
+def export_filename(filename, fmt="csv"):
+    base = f"processed_{filename}"
+    if fmt == "csv.gz":
+        return base + ".gz"
+    if fmt == "parquet":
+        return os.path.splitext(base)[0] + ".parquet"
+    return base
+
+
+def find_export(folder, filename):
+    """Path of an existing processed file for `filename` in any format, or None."""
+    for fmt in EXPORT_FORMATS:
+        path = os.path.join(folder, export_filename(filename, fmt))
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def iter_file(path, read_size=EXPORT_READ_SIZE):
+    with open(path, "rb") as f:
+        while True:
+            data = f.read(read_size)
+            if not data:
+                break
+            yield data
+
+
+class ResultExport:
+    """
+    Append classified chunks to a processed-results file; call finish() or
+    abort() once. After a failure, leave it as is so a resumed job can continue.
+    `offset` identifies how much has been written, and passing it back as
+    resume_offset continues a partial file from that point.
+    """
+
+    def __init__(self, folder, filename, fmt="csv", resume_offset=None):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}', expected one of {EXPORT_FORMATS}")
+        if fmt == "parquet" and importlib.util.find_spec("pyarrow") is None:
+            print("⚠️ pyarrow is not installed, exporting CSV instead of Parquet")
+            fmt = "csv"
+        os.makedirs(folder, exist_ok=True)
+        self.fmt = fmt
+        self.path = os.path.join(folder, export_filename(filename, fmt))
+        # Parquet files cannot be appended to once closed, so each chunk is
+        # written as its own file in a .part directory and merged by finish()
+        self.part_path = self.path + ".part"
+        self.rows = 0
+
+        if resume_offset and os.path.exists(self.part_path):
+            self._truncate(resume_offset)
+        else:
+            if resume_offset:
+                print(f"⚠️ Partial results file missing, {self.path} will only hold resumed chunks")
+            self._remove_part()
+            if fmt == "parquet":
+                os.makedirs(self.part_path)
+
+    @property
+    def offset(self):
+        """Bytes written (csv, csv.gz) or chunk files written (parquet)."""
+        if self.fmt == "parquet":
+            return len(self._parquet_parts())
+        return os.path.getsize(self.part_path) if os.path.exists(self.part_path) else 0
+
+    def _parquet_parts(self):
+        return sorted(f for f in os.listdir(self.part_path) if f.endswith(".parquet"))
+
+    def _truncate(self, offset):
+        if self.fmt == "parquet":
+            for name in self._parquet_parts()[offset:]:
+                os.remove(os.path.join(self.part_path, name))
+        else:
+            with open(self.part_path, "r+b") as f:
+                f.truncate(offset)
+
+    def _remove_part(self):
+        if os.path.isdir(self.part_path):
+            for name in os.listdir(self.part_path):
+                os.remove(os.path.join(self.part_path, name))
+            os.rmdir(self.part_path)
+        elif os.path.exists(self.part_path):
+            os.remove(self.part_path)
+
+    def append(self, df):
+        if df.empty:
+            return self.offset
+        if self.fmt == "parquet":
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(df.astype("string"), preserve_index=False)
+            pq.write_table(table, os.path.join(self.part_path, f"chunk-{self.offset:06d}.parquet"))
+        else:
+            header = self.offset == 0
+            opener = gzip.open if self.fmt == "csv.gz" else open
+            with opener(self.part_path, "ab") as f:
+                df.to_csv(f, header=header, index=False, encoding="utf-8")
+        self.rows += len(df)
+        return self.offset
+
+    def finish(self):
+        if self.fmt == "parquet":
+            self._merge_parquet()
+        elif os.path.exists(self.part_path):
+            os.replace(self.part_path, self.path)
+        return self.path
+
+    def _merge_parquet(self):
+        import pyarrow.parquet as pq
+
+        parts = self._parquet_parts()
+        if parts:
+            # One part in memory at a time; each becomes a row group of the result
+            tmp_path = self.path + ".tmp"
+            writer = None
+            for name in parts:
+                table = pq.read_table(os.path.join(self.part_path, name))
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table.cast(writer.schema.to_arrow_schema()))
+            writer.close()
+            os.replace(tmp_path, self.path)
+        self._remove_part()
+
+    def abort(self):
+        self._remove_part()
@@ -1,71 +1,96 @@
 from flask import (
     Blueprint, render_template, request, flash,
-    redirect, url_for, current_app, session, jsonify
+    redirect, url_for, current_app, session, jsonify,
+    Response, stream_with_context
 )
 import os
+import json
+import time
 import pandas as pd
 import chardet
 from werkzeug.utils import secure_filename
-from threading import Thread
 
 from app.utils import (
     allowed_file, get_db_connection,
-    set_progress, get_progress, reset_progress
+    set_progress, get_progress, progress_rate, estimate_rows,
+    get_pool_stats
 )
-from app.stage_predict import predict_toxic_and_hate_type
+from app import jobs, checkpoints
+from app.pipeline import run_pipeline
+from app.tweet_writer import TweetWriter
+from app.tweet_stats import count_rows, apply_counts, get_months, invalidate_months
+from app.hate_types import link_new_rows
+from app.word_counts import count_words, count_type_words, apply_word_counts
+from app.result_export import ResultExport, find_export, iter_file
+from app.scores import score_columns
 import secrets
 import string
 
 admin_bp = Blueprint('admin', __name__)
 
-def run_in_context(app, func, *args, **kwargs):
-    with app.app_context():
-        func(*args, **kwargs)
-
 def generate_temp_password(length=10):
     characters = string.ascii_letters + string.digits
     return ''.join(secrets.choice(characters) for _ in range(length))
 
 def register_new_user(role, email):
     password = generate_temp_password()
-    conn = get_db_connection()
-    cursor = conn.cursor()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
 
-    if role == 'admin':
-        cursor.execute("INSERT INTO admin (admin_email, temp_pwrd, first_login) VALUES (%s, %s, TRUE)", (email, password))
-    elif role == 'policymaker':
-        cursor.execute("INSERT INTO policymaker (pm_email, temp_pwrd, first_login) VALUES (%s, %s, TRUE)", (email, password))
+        if role == 'admin':
+            cursor.execute("INSERT INTO admin (admin_email, temp_pwrd, first_login) VALUES (%s, %s, TRUE)", (email, password))
+        elif role == 'policymaker':
+            cursor.execute("INSERT INTO policymaker (pm_email, temp_pwrd, first_login) VALUES (%s, %s, TRUE)", (email, password))
 
-    conn.commit()
-    cursor.close()
-    conn.close()
+        conn.commit()
+        cursor.close()
     return password
 
-def background_task(filepath, month, filename):
-    try:
-        reset_progress()
-        set_progress(5, "Connecting to database...")
-
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
+def background_task(job_id, filepath, month, filename):
+    # Imported here so the models (and torch) load on the first upload, not at app start.
+    # Runs on the inference worker pool when INFERENCE_WORKERS is set.
+    from app.inference_pool import predict
 
-        try:
-            month_fmt = pd.to_datetime(month, format="%B %Y").strftime("%Y-%m")
-        except (ValueError, TypeError):
-            month_fmt = pd.to_datetime(month, errors="coerce").strftime("%Y-%m")
-
-        cursor.execute(
-            "SELECT COUNT(*) AS count FROM tweets WHERE file_name = %s AND month = %s",
-            (filename, month_fmt)
-        )
-        if cursor.fetchone()["count"] > 0:
-            set_progress(100, "Duplicate file. Skipped.")
+    try:
+        set_progress(job_id, 5, "Connecting to database...", stage="read")
+
+        with get_db_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+
+            try:
+                month_fmt = pd.to_datetime(month, format="%B %Y").strftime("%Y-%m")
+            except (ValueError, TypeError):
+                month_fmt = pd.to_datetime(month, errors="coerce").strftime("%Y-%m")
+
+            # A retry (or re-upload after a failure) continues from its last checkpoint;
+            # otherwise a file already in tweets for this month is a duplicate
+            resume = checkpoints.resume_point(job_id, filename, month)
+            if resume is None:
+                cursor.execute(
+                    "SELECT COUNT(*) AS count FROM tweets WHERE file_name = %s AND month = %s",
+                    (filename, month_fmt)
+                )
+                duplicate = cursor.fetchone()["count"] > 0
+            else:
+                duplicate = False
+            cursor.close()
+        if duplicate:
+            set_progress(job_id, 100, "Duplicate file. Skipped.")
             return
 
+        if resume is None:
+            checkpoints.mark_started(job_id)
+            resume = {"chunks_done": 0, "rows_done": 0, "last_tweet_id": 0, "export_offset": 0}
+        else:
+            discarded = checkpoints.discard_uncommitted(filename, month_fmt, resume["last_tweet_id"])
+            print(f"🔁 Resuming {filename} after chunk {resume['chunks_done']} "
+                  f"({resume['rows_done']} rows committed, {discarded} partial rows discarded)")
+
         with open(filepath, 'rb') as f:
             raw_data = f.read(100000)
         encoding = chardet.detect(raw_data)['encoding'] or 'utf-8'
-        set_progress(10, f"Reading CSV (encoding={encoding})...")
+        rows_estimate = estimate_rows(filepath)
+        set_progress(job_id, 10, f"Reading CSV (encoding={encoding})...", stage="read", rows_done=0, rows_total=rows_estimate)
 
         try:
             chunks = pd.read_csv(
@@ -84,24 +109,42 @@ def background_task(filepath, month, filename):
                 encoding_errors="ignore"
             )
 
-        total_rows = 0
-        chunk_index = 0
-        all_chunks = []
-
-        for chunk in chunks:
-            if "text" in chunk.columns:
-                raw_texts = chunk["text"].astype(str).tolist()
-            elif "tweet" in chunk.columns:
-                raw_texts = chunk["tweet"].astype(str).tolist()
-            else:
-                set_progress(100, "Missing 'text' or 'tweet' column.")
-                return
+        total_rows = resume["rows_done"]
+        started = time.time()
+
+        def report(stage, status):
+            # 10-95% tracks rows through the pipeline; the rest is setup and export
+            resumed = resume["rows_done"]
+            rate, eta = progress_rate(started, total_rows - resumed, max(rows_estimate - resumed, 0))
+            pct = 10 + int(85 * min(total_rows / rows_estimate, 1)) if rows_estimate else 50
+            set_progress(
+                job_id, pct, status, stage=stage, rows_done=total_rows,
+                rows_total=max(rows_estimate, total_rows), rows_per_sec=rate, eta_seconds=eta
+            )
 
-            hate_preds, hate_type_dict, cleaned_texts = predict_toxic_and_hate_type(
+        # Stage 1 of the pipeline (reader thread): parse CSV chunks, skipping
+        # chunks a previous attempt already committed
+        def read_chunks():
+            for chunk_index, chunk in enumerate(chunks):
+                if chunk_index < resume["chunks_done"]:
+                    continue
+                if "text" in chunk.columns:
+                    raw_texts = chunk["text"].astype(str).tolist()
+                elif "tweet" in chunk.columns:
+                    raw_texts = chunk["tweet"].astype(str).tolist()
+                else:
+                    raise ValueError("Missing 'text' or 'tweet' column.")
+                yield chunk_index, chunk, raw_texts
+
+        # Stage 2 (inference thread): classify and build the output columns
+        def classify_chunk(item):
+            chunk_index, chunk, raw_texts = item
+            report("classify", f"Classifying chunk {chunk_index + 1}...")
+            hate_preds, hate_type_dict, cleaned_texts, scores = predict(
                 raw_texts,
-                batch_size=64
+                batch_size=64,
+                return_scores=True
             )
-            set_progress(20 + chunk_index * 5, f"Classifying chunk {chunk_index + 1}...")
 
             hate_types_list = []
             for i, flag in enumerate(hate_preds):
@@ -120,48 +163,177 @@ def background_task(filepath, month, filename):
             chunk["hate_types"] = hate_types_list
             chunk["month"] = month_fmt
             chunk["file_name"] = filename
+            chunk["hate_prob"], chunk["type_probs"], chunk["slang_override"] = score_columns(scores)
+            return chunk_index, chunk
+
+        # Stage 3 (export thread): append the chunk to the processed results file,
+        # continuing a partial file from the checkpoint when resuming
+        export = ResultExport(
+            current_app.config['UPLOAD_FOLDER'], filename,
+            current_app.config.get('EXPORT_FORMAT', 'csv'),
+            resume_offset=resume["export_offset"]
+        )
 
-            cols = ["tweet", "clean_tweet", "hate", "hate_types", "month", "file_name"]
-            placeholders = ", ".join(["%s"] * len(cols))
-            sql = f"INSERT INTO tweets ({', '.join(cols)}) VALUES ({placeholders})"
-            values = chunk[cols].values.tolist()
-
-            for start in range(0, len(values), 2000):
-                cursor.executemany(sql, values[start:start + 2000])
-                conn.commit()
-
-            all_chunks.append(chunk.copy())
+        def export_chunk(item):
+            chunk_index, chunk = item
+            report("export", f"Exporting chunk {chunk_index + 1}...")
+            # The packed Stage 2 scores are for the database only
+            return chunk_index, chunk, export.append(chunk.drop(columns=["type_probs"]))
+
+        # Stage 4 (writer thread): insert into MySQL on the writer's own connection
+        cols = ["tweet", "clean_tweet", "hate", "hate_types", "month", "file_name", "hate_prob", "type_probs", "slang_override"]
+        writer = TweetWriter(cols, binary_cols=["type_probs"])
+
+        linked_upto = resume["last_tweet_id"]  # highest tweet_id of this file already linked in tweet_hate_type
+
+        def write_chunk(item):
+            nonlocal total_rows
+            chunk_index, chunk, export_offset = item
+
+            report("insert", f"Saving chunk {chunk_index + 1} ({writer.method})...")
+            counts = count_rows(chunk["month"], chunk["hate"], chunk["hate_types"])
+            word_counts = count_words(chunk["month"], chunk["hate"], chunk["tweet"])
+            type_word_counts = count_type_words(chunk["month"], chunk["hate"], chunk["hate_types"], chunk["tweet"])
+
+            # Aggregates, hate-type links and the chunk's checkpoint are written
+            # in the chunk's transaction
+            def after_insert(cur):
+                nonlocal linked_upto
+                apply_counts(cur, counts)
+                apply_word_counts(cur, word_counts, type_word_counts)
+                type_names = {key[2] for key in counts if key[2]}
+                linked_upto = link_new_rows(cur, filename, month_fmt, linked_upto, type_names)
+                checkpoints.save_checkpoint(
+                    cur, job_id, chunk_index, total_rows + len(chunk), linked_upto, export_offset
+                )
+
+            writer.write(chunk[cols].values.tolist(), after=after_insert)
             total_rows += len(chunk)
-            chunk_index += 1
+
+        # Inserts for chunk N overlap with the export of N+1, inference for N+2
+        # and parsing of N+3. On failure the checkpoints and the partial export
+        # are kept so a retry can resume.
+        try:
+            run_pipeline(
+                read_chunks(),
+                [("classify", classify_chunk), ("export", export_chunk), ("insert", write_chunk)],
+                queue_size=1,
+                app=current_app._get_current_object()
+            )
+        except Exception:
+            writer.abort()
+            raise
+        writer.finish()
+        print(f"📝 {filename}: {writer.rows} rows written with {writer.method} at {writer.rows_per_sec} rows/s")
 
         if total_rows == 0:
-            set_progress(100, "⚠️ No tweets processed.")
+            export.abort()
+            set_progress(job_id, 100, "⚠️ No tweets processed.")
             return
 
-        # Combine all processed data and save as a unified CSV
-        final_df = pd.concat(all_chunks, ignore_index=True)
-        upload_folder = current_app.config['UPLOAD_FOLDER']
-        
-        if not os.path.exists(upload_folder):
-            os.makedirs(upload_folder, exist_ok=True)
-            
-        output_filename = f"processed_{filename}"
-        output_path = os.path.join(upload_folder, output_filename)
-        
-        # Saving relevant analysis columns
-        final_df.to_csv(output_path, index=False, encoding="utf-8")
+        report("export", "Finishing processed results file...")
+        export.finish()
+        invalidate_months()
 
-        cursor.close()
-        conn.close()
-        set_progress(100, "✅ Upload and processing complete.")
+        rate, _ = progress_rate(started, total_rows - resume["rows_done"])
+        set_progress(
+            job_id, 100, f"✅ Upload and processing complete ({writer.method} writer: {writer.rows_per_sec:,.0f} rows/s).",
+            stage="export", rows_done=total_rows, rows_total=total_rows, rows_per_sec=rate, eta_seconds=0
+        )
 
     except Exception as e:
         print("❌ Upload error:", e)
-        set_progress(100, "❌ Processing error.")
+        invalidate_months()  # chunks committed before the failure are visible
+        set_progress(job_id, 100, f"❌ Processing error: {e}")
+        raise  # marks the job as failed
+
+jobs.register_task("upload", background_task)
 
 @admin_bp.route("/upload_progress")
 def upload_progress():
+    # Most recent job; kept for callers that don't know their job ID
     return jsonify(get_progress())
+
+@admin_bp.route("/upload_progress/<job_id>")
+def upload_job_progress(job_id):
+    return jsonify(get_progress(job_id))
+
+@admin_bp.route("/upload_progress/<job_id>/stream")
+def upload_job_progress_stream(job_id):
+    """Server-sent events: push the job's progress whenever it changes, until it finishes."""
+    def generate():
+        last = None
+        while True:
+            data = get_progress(job_id)
+            payload = json.dumps(data, default=str)
+            if payload != last:
+                yield f"data: {payload}\n\n"
+                last = payload
+            if data.get("job_status") in (jobs.DONE, jobs.FAILED) or "job_id" not in data:
+                break
+            time.sleep(1)
+
+    return Response(stream_with_context(generate()), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@admin_bp.route("/upload_jobs")
+def upload_jobs():
+    if session.get("role") != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    return jsonify({"queue_depth": jobs.queue_depth(), "jobs": jobs.list_jobs()})
+
+@admin_bp.route("/upload_jobs/<job_id>")
+def upload_job(job_id):
+    if session.get("role") != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    job = jobs.get_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+@admin_bp.route("/upload_jobs/<job_id>/retry", methods=["POST"])
+def retry_upload_job(job_id):
+    if session.get("role") != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    if not jobs.retry_job(job_id):
+        return jsonify({"error": "Only failed jobs can be retried"}), 409
+    return jsonify(jobs.get_job(job_id))
+
+@admin_bp.route("/upload_jobs/<job_id>/result")
+def upload_job_result(job_id):
+    if session.get("role") != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    job = jobs.get_job(job_id)
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+    path = find_export(current_app.config['UPLOAD_FOLDER'], job["file_name"])
+    if not path:
+        return jsonify({"error": "No processed results for this job"}), 404
+
+    # Streamed in fixed-size blocks so large results never sit in memory
+    name = os.path.basename(path)
+    return Response(stream_with_context(iter_file(path)), mimetype="application/octet-stream",
+                    headers={"Content-Disposition": f'attachment; filename="{name}"',
+                             "Content-Length": str(os.path.getsize(path))})
+
+@admin_bp.route("/db_pool_stats")
+def db_pool_stats():
+    if session.get("role") != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    return jsonify(get_pool_stats())
+
+@admin_bp.route("/prediction_cache_stats")
+def prediction_cache_stats():
+    if session.get("role") != "admin":
+        return jsonify({"error": "Unauthorized"}), 403
+
+    from app import prediction_cache
+    return jsonify(prediction_cache.get_stats())
     
 @admin_bp.route("/upload", methods=["GET", "POST"])
 def upload_file():
@@ -182,17 +354,16 @@ def upload_file():
         filepath = os.path.join(upload_folder, filename)
         file.save(filepath)
 
-        app = current_app._get_current_object()
-        Thread(target=run_in_context, args=(app, background_task, filepath, month, filename)).start()
+        try:
+            priority = int(request.form.get("priority", jobs.DEFAULT_PRIORITY))
+        except ValueError:
+            priority = jobs.DEFAULT_PRIORITY
 
-        return render_template("admin/upload_progress.html")
+        job_id = jobs.submit_job("upload", filepath, month, filename, priority=priority)
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT DISTINCT month FROM tweets")
-    existing_months = [row["month"] for row in cursor.fetchall()]
-    cursor.close()
-    conn.close()
+        return render_template("admin/upload_progress.html", job_id=job_id)
+
+    existing_months = get_months()
 
     return render_template("admin/upload.html", existing_months=existing_months)
 
@@ -217,49 +388,48 @@ def register_csv():
             flash("CSV must have 'email' and 'role' columns.", "danger")
             return redirect(request.url)
 
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        for _, row in df.iterrows():
-            email = str(row['email']).strip().lower()
-            role_code = str(row['role']).strip()
-
-            if not is_main_admin and role_code != '2':
-                skipped_users.append({"email": email, "reason": "Restricted to policymaker roles only"})
-                continue
-
-            if role_code == '1':
-                role = 'admin'
-                email_col = 'admin_email'
-            elif role_code == '2':
-                role = 'policymaker'
-                email_col = 'pm_email'
-            else:
-                skipped_users.append({"email": email, "reason": "Invalid role code"})
-                continue
+        with get_db_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
 
-            cursor.execute("""
-                SELECT email FROM (
-                    SELECT LOWER(admin_email) AS email FROM admin
-                    UNION
-                    SELECT LOWER(pm_email) AS email FROM policymaker
-                ) AS all_users
-                WHERE email = %s
-            """, (email,))
-            if cursor.fetchone():
-                skipped_users.append({"email": email, "reason": "Account already exists"})
-                continue
+            for _, row in df.iterrows():
+                email = str(row['email']).strip().lower()
+                role_code = str(row['role']).strip()
 
-            temp_pw = generate_temp_password()
-            cursor.execute(
-                f"INSERT INTO {role} ({email_col}, temp_pwrd, first_login) VALUES (%s, %s, TRUE)",
-                (email, temp_pw)
-            )
-            created_users.append({"email": email, "role": role, "password": temp_pw})
+                if not is_main_admin and role_code != '2':
+                    skipped_users.append({"email": email, "reason": "Restricted to policymaker roles only"})
+                    continue
 
-        conn.commit()
-        cursor.close()
-        conn.close()
+                if role_code == '1':
+                    role = 'admin'
+                    email_col = 'admin_email'
+                elif role_code == '2':
+                    role = 'policymaker'
+                    email_col = 'pm_email'
+                else:
+                    skipped_users.append({"email": email, "reason": "Invalid role code"})
+                    continue
+
+                cursor.execute("""
+                    SELECT email FROM (
+                        SELECT LOWER(admin_email) AS email FROM admin
+                        UNION
+                        SELECT LOWER(pm_email) AS email FROM policymaker
+                    ) AS all_users
+                    WHERE email = %s
+                """, (email,))
+                if cursor.fetchone():
+                    skipped_users.append({"email": email, "reason": "Account already exists"})
+                    continue
+
+                temp_pw = generate_temp_password()
+                cursor.execute(
+                    f"INSERT INTO {role} ({email_col}, temp_pwrd, first_login) VALUES (%s, %s, TRUE)",
+                    (email, temp_pw)
+                )
+                created_users.append({"email": email, "role": role, "password": temp_pw})
+
+            conn.commit()
+            cursor.close()
 
         if created_users:
             flash(f"✅ {len(created_users)} user(s) created.", "success")
@@ -274,16 +444,15 @@ def user_list():
         flash("Unauthorized access.", "danger")
         return redirect(url_for("auth.dashboard"))
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    with get_db_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
 
-    cursor.execute("SELECT 'admin' AS role, admin_email AS email, temp_pwrd, is_main_admin FROM admin")
-    admins = cursor.fetchall()
-    cursor.execute("SELECT 'policymaker' AS role, pm_email AS email, temp_pwrd FROM policymaker")
-    pms = cursor.fetchall()
+        cursor.execute("SELECT 'admin' AS role, admin_email AS email, temp_pwrd, is_main_admin FROM admin")
+        admins = cursor.fetchall()
+        cursor.execute("SELECT 'policymaker' AS role, pm_email AS email, temp_pwrd FROM policymaker")
+        pms = cursor.fetchall()
 
-    cursor.close()
-    conn.close()
+        cursor.close()
 
     main_admin = [a for a in admins if a.get("is_main_admin")]
     other_admins = [a for a in admins if not a.get("is_main_admin")]
@@ -309,32 +478,31 @@ def update_user():
     if not is_main_admin and (original_role == "admin" or new_role == "admin"):
         return jsonify({"error": "Restricted: You cannot modify admin users."})
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    with get_db_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
 
-    cursor.execute("SELECT admin_pwrd FROM admin WHERE admin_email = %s", (session["email"],))
-    admin = cursor.fetchone()
-    if not admin or admin["admin_pwrd"] != admin_password:
-        return jsonify({"error": "Invalid admin password"}), 401
+        cursor.execute("SELECT admin_pwrd FROM admin WHERE admin_email = %s", (session["email"],))
+        admin = cursor.fetchone()
+        if not admin or admin["admin_pwrd"] != admin_password:
+            return jsonify({"error": "Invalid admin password"}), 401
 
-    if new_email != original_email:
-        cursor.execute("SELECT admin_email FROM admin WHERE admin_email = %s", (new_email,))
-        if cursor.fetchone():
-            return jsonify({"error": "Email already exists."})
+        if new_email != original_email:
+            cursor.execute("SELECT admin_email FROM admin WHERE admin_email = %s", (new_email,))
+            if cursor.fetchone():
+                return jsonify({"error": "Email already exists."})
 
-    if original_role == "admin":
-        cursor.execute("DELETE FROM admin WHERE admin_email = %s", (original_email,))
-    else:
-        cursor.execute("DELETE FROM policymaker WHERE pm_email = %s", (original_email,))
+        if original_role == "admin":
+            cursor.execute("DELETE FROM admin WHERE admin_email = %s", (original_email,))
+        else:
+            cursor.execute("DELETE FROM policymaker WHERE pm_email = %s", (original_email,))
 
-    if new_role == "admin":
-        cursor.execute("INSERT INTO admin (admin_email, temp_pwrd, first_login) VALUES (%s, NULL, FALSE)", (new_email,))
-    else:
-        cursor.execute("INSERT INTO policymaker (pm_email, temp_pwrd, first_login) VALUES (%s, NULL, FALSE)", (new_email,))
+        if new_role == "admin":
+            cursor.execute("INSERT INTO admin (admin_email, temp_pwrd, first_login) VALUES (%s, NULL, FALSE)", (new_email,))
+        else:
+            cursor.execute("INSERT INTO policymaker (pm_email, temp_pwrd, first_login) VALUES (%s, NULL, FALSE)", (new_email,))
 
-    conn.commit()
-    cursor.close()
-    conn.close()
+        conn.commit()
+        cursor.close()
 
     return jsonify({"success": True})
 
@@ -349,28 +517,27 @@ def delete_user():
     roles = data.get("roles", [])
     password = data.get("password")
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT admin_pwrd FROM admin WHERE admin_email = %s", (session["email"],))
-    result = cursor.fetchone()
-
-    if not result or result["admin_pwrd"] != password:
-        return jsonify({"error": "Invalid password"}), 401
-
-    deleted, skipped = [], []
-    for email, role in zip(emails, roles):
-        if not is_main_admin and role == "admin":
-            skipped.append(email)
-            continue
-
-        if role == "admin":
-            cursor.execute("DELETE FROM admin WHERE admin_email = %s", (email,))
-        elif role == "policymaker":
-            cursor.execute("DELETE FROM policymaker WHERE pm_email = %s", (email,))
-        deleted.append(email)
-
-    conn.commit()
-    cursor.close()
-    conn.close()
+    with get_db_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("SELECT admin_pwrd FROM admin WHERE admin_email = %s", (session["email"],))
+        result = cursor.fetchone()
+
+        if not result or result["admin_pwrd"] != password:
+            return jsonify({"error": "Invalid password"}), 401
+
+        deleted, skipped = [], []
+        for email, role in zip(emails, roles):
+            if not is_main_admin and role == "admin":
+                skipped.append(email)
+                continue
+
+            if role == "admin":
+                cursor.execute("DELETE FROM admin WHERE admin_email = %s", (email,))
+            elif role == "policymaker":
+                cursor.execute("DELETE FROM policymaker WHERE pm_email = %s", (email,))
+            deleted.append(email)
+
+        conn.commit()
+        cursor.close()
 
     return jsonify({"deleted": deleted, "skipped": skipped})
\ No newline at end of file
@@ -11,25 +11,24 @@ def login():
         password = request.form.get("password", "").strip()
         role = request.form.get("role")
 
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        # Determine the correct query based on role
-        if role == "admin":
-            query = "SELECT * FROM admin WHERE admin_email = %s"
-        elif role == "policymaker":
-            query = "SELECT * FROM policymaker WHERE pm_email = %s"
-        else:
-            query = None
+        with get_db_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+
+            # Determine the correct query based on role
+            if role == "admin":
+                query = "SELECT * FROM admin WHERE admin_email = %s"
+            elif role == "policymaker":
+                query = "SELECT * FROM policymaker WHERE pm_email = %s"
+            else:
+                query = None
 
-        if not query:
-            flash("Incorrect credentials. Please try again.", "danger")
-            return redirect(url_for('auth.login'))
+            if not query:
+                flash("Incorrect credentials. Please try again.", "danger")
+                return redirect(url_for('auth.login'))
 
-        cursor.execute(query, (email,))
-        user = cursor.fetchone()
-        cursor.close()
-        conn.close()
+            cursor.execute(query, (email,))
+            user = cursor.fetchone()
+            cursor.close()
 
         if not user:
             flash("Incorrect credentials. Please try again.", "danger")
@@ -91,23 +90,22 @@ def reset_password():
             flash("Passwords do not match.", "danger")
             return redirect(url_for("auth.reset_password"))
 
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        with get_db_connection() as conn:
+            cursor = conn.cursor()
 
-        if role == "admin":
-            cursor.execute("""
-                UPDATE admin SET admin_pwrd = %s, first_login = FALSE, temp_pwrd = NULL
-                WHERE admin_email = %s
-            """, (new_pw, email))
-        elif role == "policymaker":
-            cursor.execute("""
-                UPDATE policymaker SET pm_pwrd = %s, first_login = FALSE, temp_pwrd = NULL
-                WHERE pm_email = %s
-            """, (new_pw, email))
+            if role == "admin":
+                cursor.execute("""
+                    UPDATE admin SET admin_pwrd = %s, first_login = FALSE, temp_pwrd = NULL
+                    WHERE admin_email = %s
+                """, (new_pw, email))
+            elif role == "policymaker":
+                cursor.execute("""
+                    UPDATE policymaker SET pm_pwrd = %s, first_login = FALSE, temp_pwrd = NULL
+                    WHERE pm_email = %s
+                """, (new_pw, email))
 
-        conn.commit()
-        cursor.close()
-        conn.close()
+            conn.commit()
+            cursor.close()
 
         session.pop("force_password_reset", None)
         flash("Password reset successfully. Please continue.", "success")
@@ -136,31 +134,30 @@ def change_password():
             flash("New password cannot be the same as the current password.", "warning")
             return redirect(url_for("auth.change_password"))
 
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
+        with get_db_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
 
-        if role == "admin":
-            cursor.execute("SELECT admin_pwrd, temp_pwrd, first_login FROM admin WHERE admin_email = %s", (email,))
-        else:
-            cursor.execute("SELECT pm_pwrd, temp_pwrd, first_login FROM policymaker WHERE pm_email = %s", (email,))
-        user = cursor.fetchone()
+            if role == "admin":
+                cursor.execute("SELECT admin_pwrd, temp_pwrd, first_login FROM admin WHERE admin_email = %s", (email,))
+            else:
+                cursor.execute("SELECT pm_pwrd, temp_pwrd, first_login FROM policymaker WHERE pm_email = %s", (email,))
+            user = cursor.fetchone()
 
-        current_pw_stored = user["admin_pwrd"] if role == "admin" else user["pm_pwrd"]
-        temp_pw_stored = user["temp_pwrd"]
+            current_pw_stored = user["admin_pwrd"] if role == "admin" else user["pm_pwrd"]
+            temp_pw_stored = user["temp_pwrd"]
 
-        if current_pw not in [current_pw_stored, temp_pw_stored]:
-            flash("Current password incorrect.", "danger")
-            return redirect(url_for("auth.change_password"))
+            if current_pw not in [current_pw_stored, temp_pw_stored]:
+                flash("Current password incorrect.", "danger")
+                return redirect(url_for("auth.change_password"))
 
-        # Update password and disable first_login
-        if role == "admin":
-            cursor.execute("UPDATE admin SET admin_pwrd = %s, first_login = FALSE WHERE admin_email = %s", (new_pw, email))
-        else:
-            cursor.execute("UPDATE policymaker SET pm_pwrd = %s, first_login = FALSE WHERE pm_email = %s", (new_pw, email))
+            # Update password and disable first_login
+            if role == "admin":
+                cursor.execute("UPDATE admin SET admin_pwrd = %s, first_login = FALSE WHERE admin_email = %s", (new_pw, email))
+            else:
+                cursor.execute("UPDATE policymaker SET pm_pwrd = %s, first_login = FALSE WHERE pm_email = %s", (new_pw, email))
 
-        conn.commit()
-        cursor.close()
-        conn.close()
+            conn.commit()
+            cursor.close()
 
         flash("Password changed successfully!", "success")
         return redirect(request.referrer or url_for("auth.dashboard"))
@@ -1,17 +1,136 @@
-from flask import Blueprint, request, jsonify
-from app.stage_predict import predict_toxic_and_hate_type
+import hmac
+import json
+from itertools import islice
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+
+from app import inference_pool
+from app.micro_batcher import get_batcher, QueueFull
 
 classify_bp = Blueprint("classify", __name__)
 
+# POST /classify accepts
+#   {"text": "..."}                  -> one JSON result
+#   {"texts": ["...", ...]} or [...] -> NDJSON, one result line per text
+#   application/x-ndjson body        -> NDJSON; each line is a string or
+#                                       {"text": "...", "id": ...}
+# Texts are classified in batches of CLASSIFY_BATCH_SIZE and each batch is
+# streamed back as soon as it is done, so large requests never wait for the
+# whole input. Result lines keep the input order and carry "index" (and "id"
+# when given). When CLASSIFY_API_KEY is set, every request must send it in the
+# X-API-Key header.
+NDJSON = "application/x-ndjson"
+
+
+@classify_bp.before_request
+def require_api_key():
+    api_key = current_app.config.get("CLASSIFY_API_KEY")
+    if not api_key:
+        return None
+    sent = request.headers.get("X-API-Key", "")
+    if not hmac.compare_digest(sent.encode(), api_key.encode()):
+        return jsonify({"error": "Missing or invalid X-API-Key"}), 401
+    return None
+
+
+def _result(index, item_id, label_pred, hate_types, score):
+    result = {
+        "index": index,
+        "label": "hate" if label_pred == 1 else "non-hate",
+        "hate_types": hate_types if label_pred == 1 else [],
+        "probabilities": {"hate": score["hate_prob"], "hate_types": score["type_probs"]},
+        "slang_override": score["slang_override"],
+    }
+    if item_id is not None:
+        result["id"] = item_id
+    return result
+
+
+def _classify_batch(batch):
+    """batch: list of (index, id, text). Returns result dicts in the same order."""
+    texts = [text for _, _, text in batch]
+    if current_app.config.get("CLASSIFY_COALESCE", True):
+        # Shares model batches with concurrent requests (see app.micro_batcher)
+        preds, hate_type_dict, scores = get_batcher(current_app.config).classify(texts)
+    else:
+        preds, hate_type_dict, _, scores = inference_pool.predict(texts, return_scores=True)
+    return [
+        _result(index, item_id, preds[i], hate_type_dict.get(i, []), scores[i])
+        for i, (index, item_id, _) in enumerate(batch)
+    ]
+
+
+def _parse_item(index, item):
+    """Return (index, id, text) or raise ValueError for an unusable item."""
+    item_id = None
+    if isinstance(item, dict):
+        item_id = item.get("id")
+        item = item.get("text")
+    if not isinstance(item, str) or not item.strip():
+        raise ValueError("Expected a non-empty string or an object with a 'text' field")
+    return index, item_id, item
+
+
+def _ndjson_items():
+    # Read the request body line by line instead of loading it all
+    for line in request.stream:
+        line = line.strip()
+        if line:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+
+def _stream_results(items):
+    batch_size = current_app.config.get("CLASSIFY_BATCH_SIZE", 256)
+    indexed = enumerate(items)
+    while True:
+        batch, errors = [], []
+        for index, item in islice(indexed, batch_size):
+            try:
+                batch.append(_parse_item(index, item))
+            except ValueError as e:
+                errors.append({"index": index, "error": str(e)})
+        if not batch and not errors:
+            return
+        try:
+            results = _classify_batch(batch) if batch else []
+        except QueueFull as e:
+            results = [{"index": index, "error": str(e)} for index, _, _ in batch]
+        # Merge errors back in input order
+        for result in sorted(results + errors, key=lambda r: r["index"]):
+            yield json.dumps(result) + "\n"
+
+
 @classify_bp.route("/classify", methods=["POST"])
 def classify():
-    data = request.json or {}
-    # Accept a single "text" field; ignore if empty
-    text = data.get("text", "").strip()
-    if not text:
-        return jsonify({"error": "No text provided"}), 400
-
-    # predict_toxic_and_hate_type expects a list of strings
-    results = predict_toxic_and_hate_type([text])
-    # Return the first (and only) result as JSON
-    return jsonify(results[0])
+    if request.mimetype == NDJSON:
+        items = _ndjson_items()
+    else:
+        data = request.get_json(silent=True)
+        if isinstance(data, dict) and "text" in data:
+            # Single text: plain JSON response
+            try:
+                item = _parse_item(0, data)
+            except ValueError:
+                return jsonify({"error": "No text provided"}), 400
+            try:
+                return jsonify(_classify_batch([item])[0])
+            except QueueFull as e:
+                return jsonify({"error": str(e)}), 503
+        if isinstance(data, dict):
+            data = data.get("texts")
+        if not isinstance(data, list):
+            return jsonify({"error": "Send 'text', a 'texts' array or an NDJSON body"}), 400
+        max_texts = current_app.config.get("CLASSIFY_MAX_TEXTS", 1000)
+        if len(data) > max_texts:
+            return jsonify({"error": f"At most {max_texts} texts per JSON request; stream NDJSON for more"}), 413
+        items = iter(data)
+
+    return Response(stream_with_context(_stream_results(items)), mimetype=NDJSON)
+
+
+@classify_bp.route("/classify/stats")
+def classify_stats():
+    return jsonify(get_batcher(current_app.config).get_stats())
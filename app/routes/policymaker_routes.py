@@ -1,20 +1,20 @@
-from flask import Blueprint, render_template, request, flash
+from flask import (
+    Blueprint, render_template, request, flash, jsonify,
+    url_for, abort, current_app, Response
+)
 import pandas as pd
 from app.utils import get_db_connection
-import os
-from io import BytesIO
-import base64
-from wordcloud import WordCloud
+from app.tweet_stats import fetch_stats, get_months
+from app.tweet_query import build_filters, fetch_page, summarize, DEFAULT_PAGE_SIZE
+from app.word_counts import render_wordcloud, top_type_keywords
+from app.hate_types import type_filter_sql
+import hashlib
 import plotly.graph_objects as go
 from nltk.corpus import stopwords
-import re
 from collections import Counter
-from nltk.corpus import stopwords
-import malaya
 from datetime import datetime
+from functools import lru_cache
 
-malay_stopwords = malaya.text.function.get_stopwords()
-eng_stop = set(stopwords.words("english"))
 custom_stop = {
     "saya", "awak", "kau", "user", "http","https","kita", "kamu", "dia", "mereka", "kami", "yang", "itu", "ini",
     "dan", "atau", "dengan", "dalam", "kepada", "untuk", "akan", "telah", "boleh", "tidak",
@@ -25,33 +25,31 @@ custom_stop = {
     "ada", "apabila", "ia", "ni", "aku", "co", "tco", "tu", "ni", "tak", "dgn", "je", "ke", "yg",
     "dah","la","tapi","kalau","nk","kat","ke", "pon", "pun", "karena", "kerana", "knp"
 }
-all_stopwords = eng_stop.union(custom_stop).union(malay_stopwords)
+
+# Stopword lists are loaded on first use; malaya in particular is slow to import
+@lru_cache(maxsize=None)
+def get_eng_stopwords():
+    return frozenset(stopwords.words("english"))
+
+@lru_cache(maxsize=None)
+def get_all_stopwords():
+    import malaya
+    malay_stopwords = malaya.text.function.get_stopwords()
+    return get_eng_stopwords().union(custom_stop).union(malay_stopwords)
 
 
 policymaker_bp = Blueprint('policymaker', __name__)
 
 @policymaker_bp.route("/visualise/overview", methods=["GET", "POST"])
 def overview():
-    import pandas as pd
-    import re, base64
-    from io import BytesIO
-    from collections import Counter
-    from wordcloud import WordCloud
-
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT DISTINCT month FROM tweets ORDER BY month")
-    months = [row["month"] for row in cursor.fetchall()]
-    cursor.close()
-    conn.close()
+    months = get_months()
 
     if not months:
         flash("No tweet data available. Please upload data first.", "warning")
         return render_template("visualisation/overview.html", months=[], selected_months=[], insights=[], chart_data={}, type_fig="", wordclouds={}, summary_table=[], policy_brief="")
 
-    # Handle month selection and chart type
+    # Handle month selection
     if request.method == "POST":
-        chart_type = request.form.get("chart_type") or "bar"
         selected_month = request.form.get("month")
         show_all = request.form.get("months") == "1"
         if show_all:
@@ -62,19 +60,15 @@ def overview():
             selected_months = [months[-1]]
     else:
         selected_months = [months[-1]]
-        chart_type = "bar"
-
-    # Query tweets for selected months
-    placeholder = ",".join(["%s"] * len(selected_months))
-    sql = f"""SELECT month, hate, hate_types, tweet FROM tweets WHERE month IN ({placeholder}) ORDER BY month"""
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute(sql, selected_months)
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-
-    if not rows:
+
+    # Counts come from the pre-aggregated monthly stats
+    label_counts, month_type_counts = fetch_stats(selected_months)
+
+    # Tweet counts
+    hate_counts = [label_counts[m]["hate"] for m in selected_months]
+    non_hate_counts = [label_counts[m]["non-hate"] for m in selected_months]
+
+    if not sum(hate_counts) + sum(non_hate_counts):
         flash("No data found for selected filters.", "info")
         return render_template("visualisation/overview.html",
             months=months,
@@ -87,34 +81,17 @@ def overview():
             policy_brief="No tweet data available."
         )
 
-    df = pd.DataFrame(rows)
-
-    # Tweet counts
-    hate_counts = []
-    non_hate_counts = []
-    for m in selected_months:
-        m_df = df[df["month"] == m]
-        hate_counts.append(int((m_df["hate"] == "hate").sum()))
-        non_hate_counts.append(int((m_df["hate"] == "non-hate").sum()))
-
     total_hate = sum(hate_counts)
     total_non = sum(non_hate_counts)
     total_all = total_hate + total_non
     hate_pct = round((total_hate / total_all) * 100, 1) if total_all else 0
 
     # Top hate type
-    hate_only_df = df[df["hate"] == "hate"]
-    types_flat = []
-    for val in hate_only_df["hate_types"].dropna():
-        for t in str(val).split(","):
-            t_clean = t.strip().lower()
-            if t_clean:
-                types_flat.append(t_clean)
-    type_counter = Counter(types_flat)
+    type_counter = sum(month_type_counts.values(), Counter())
     top_type = type_counter.most_common(1)[0][0].capitalize() if type_counter else "None"
 
     # Peak hate month
-    month_hate_map = {m: (df[df["month"] == m]["hate"] == "hate").sum() for m in selected_months}
+    month_hate_map = dict(zip(selected_months, hate_counts))
     peak_month = max(month_hate_map, key=month_hate_map.get) if month_hate_map else "N/A"
 
     insights = [
@@ -124,22 +101,14 @@ def overview():
         {"label": "Peak Hate Month", "value": peak_month, "icon": "bi bi-calendar-event", "color": "secondary"},
     ]
 
-    # Word clouds
-    stop_words = eng_stop.union(custom_stop)
+    # Word clouds are separate cacheable images built from the per-month word
+    # counts; v changes whenever an upload adds tweets for these months
     wordclouds = {"non_hate": "", "hate": ""}
-    for label, label_key in [("non-hate", "non_hate"), ("hate", "hate")]:
-        subset = df[df["hate"] == label]
-        if not subset.empty:
-            text = " ".join(subset["tweet"].astype(str)).lower()
-            tokens = re.findall(r"\b[a-zA-Z]+\b", text)
-            filtered = [w for w in tokens if w not in stop_words and not w.startswith("http")]
-            clean_text = " ".join(filtered)
-
-            wc = WordCloud(stopwords=stop_words, background_color="white", width=400, height=200).generate(clean_text)
-            buffer = BytesIO()
-            wc.to_image().save(buffer, format="PNG")
-            b64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
-            wordclouds[label_key] = b64
+    for label, label_key, total in [("non-hate", "non_hate", total_non), ("hate", "hate", total_hate)]:
+        if total:
+            wordclouds[label_key] = url_for(
+                "policymaker.wordcloud", label=label, month=selected_months, v=total
+            )
 
     # Summary table
     summary_table = [{"type": t.capitalize(), "count": c} for t, c in type_counter.most_common()]
@@ -169,6 +138,30 @@ def overview():
         month_max_hate=peak_month
     )
 
+@policymaker_bp.route("/visualise/wordcloud.png")
+def wordcloud():
+    """PNG word cloud for ?label=hate|non-hate and one or more ?month= values."""
+    label = request.args.get("label")
+    months = request.args.getlist("month")
+    if label not in ("hate", "non-hate") or not months:
+        abort(400)
+
+    label_counts, _ = fetch_stats(months)
+    data_version = sum(c[label] for c in label_counts.values())
+    stop_words = get_eng_stopwords().union(custom_stop)
+    png = render_wordcloud(
+        months, label, stop_words, data_version,
+        max_entries=current_app.config.get("WORDCLOUD_CACHE_SIZE", 32)
+    )
+    if png is None:
+        abort(404)
+
+    response = Response(png, mimetype="image/png")
+    response.set_etag(hashlib.sha1(png).hexdigest())
+    response.cache_control.public = True
+    response.cache_control.max_age = 86400
+    return response.make_conditional(request)
+
 def parse_month_str(month_str):
     try:
         return datetime.strptime(month_str, "%B %Y").strftime("%Y-%m")  # From "June 2024" → "2024-06"
@@ -178,8 +171,6 @@ def parse_month_str(month_str):
 @policymaker_bp.route("/visualise/compare", methods=["GET", "POST"])
 def compare():
     import plotly.graph_objects as go
-    from collections import Counter
-    import pandas as pd
     from datetime import datetime
 
     def parse_month_str(month_str):
@@ -189,12 +180,7 @@ def compare():
             return None
 
     # Fetch available months
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT DISTINCT month FROM tweets ORDER BY month")
-    months = [row["month"] for row in cursor.fetchall()]
-    cursor.close()
-    conn.close()
+    months = get_months()
 
     if not months:
         flash("No tweet data available. Please upload data first.", "warning")
@@ -211,32 +197,18 @@ def compare():
             return render_template("visualisation/compare.html", months=months, show_comparison=False)
 
         selected = [month1_parsed, month2_parsed]
-        placeholder = ",".join(["%s"] * 2)
-
-        # Fetch tweet data
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(f"""
-            SELECT month, hate, hate_types
-            FROM tweets
-            WHERE month IN ({placeholder})
-        """, selected)
-        rows = cursor.fetchall()
-        cursor.close()
-        conn.close()
 
-        df = pd.DataFrame(rows)
-        if df.empty:
+        # Fetch pre-aggregated counts
+        label_counts, type_counts = fetch_stats(selected)
+        if not any(label_counts[m]["hate"] + label_counts[m]["non-hate"] for m in selected):
             flash("No tweet data available for the selected months.", "info")
             return render_template("visualisation/compare.html", months=months, show_comparison=False)
 
-        df["hate"] = df["hate"].replace({1: "hate", 0: "non-hate"})
-
         # Count hate/non-hate tweets
         counts = {
             m: {
-                "hate": ((df["month"] == m) & (df["hate"] == "hate")).sum(),
-                "non_hate": ((df["month"] == m) & (df["hate"] == "non-hate")).sum()
+                "hate": label_counts[m]["hate"],
+                "non_hate": label_counts[m]["non-hate"]
             }
             for m in selected
         }
@@ -265,15 +237,6 @@ def compare():
         hate_bar_chart = hate_bar_fig.to_html(full_html=False)
 
         # Hate type breakdown
-        type_counts = {m: Counter() for m in selected}
-        for m in selected:
-            m_df = df[(df["month"] == m) & (df["hate"] == "hate") & df["hate_types"].notna()]
-            for row in m_df["hate_types"]:
-                for t in str(row).split(","):
-                    clean = t.strip().lower()
-                    if clean:
-                        type_counts[m][clean] += 1
-
         all_types = sorted(set(type_counts[month1_parsed].keys()) | set(type_counts[month2_parsed].keys()))
         type1_vals = [type_counts[month1_parsed].get(t, 0) for t in all_types]
         type2_vals = [type_counts[month2_parsed].get(t, 0) for t in all_types]
@@ -335,15 +298,9 @@ def compare():
 @policymaker_bp.route("/visualise/trend", methods=["GET", "POST"])
 def trend():
     from statistics import stdev
-    from collections import defaultdict
 
     # ─── 1) Fetch all distinct months ───────────────────────────────
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT DISTINCT month FROM tweets ORDER BY month")
-    months = [row["month"] for row in cursor.fetchall()]
-    cursor.close()
-    conn.close()
+    months = get_months()
 
     if not months:
         flash("No tweet data available. Please upload data first.", "warning")
@@ -362,28 +319,15 @@ def trend():
     else:
         selected_months = [months[-1]]
 
-    # ─── 3) Load tweets ─────────────────────────────────────────────
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT month, hate, hate_types FROM tweets ORDER BY month")
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-
-    df = pd.DataFrame(rows)
-    if df.empty:
+    # ─── 3) Load pre-aggregated monthly counts ──────────────────────
+    label_counts, month_type_counts = fetch_stats(months)
+    if not any(c["hate"] + c["non-hate"] for c in label_counts.values()):
         return render_template("visualisation/trend.html", no_data=True)
 
     # ─── 4) Hate vs. Non-Hate Chart ─────────────────────────────────
-    pivot = (
-        df.groupby(["month", "hate"]).size()
-        .reset_index(name="count")
-        .pivot(index="month", columns="hate", values="count")
-        .fillna(0).astype(int)
-        .reindex(months, fill_value=0)
-    )
-    pivot["non-hate"] = pivot.get("non-hate", 0)
-    pivot["hate"] = pivot.get("hate", 0)
+    pivot = pd.DataFrame(
+        [label_counts[m] for m in months], index=months, columns=["hate", "non-hate"]
+    ).fillna(0).astype(int)
 
     hate_line_fig = go.Figure()
     hate_line_fig.add_trace(go.Scatter(x=months, y=pivot["non-hate"], name="Non-Hate", mode="lines+markers", line=dict(color="green")))
@@ -392,13 +336,9 @@ def trend():
     hate_line_html = hate_line_fig.to_html(full_html=False)
 
     # ─── 5) Hate Type Trends ────────────────────────────────────────
-    hate_only = df[df["hate"] == "hate"]
-    hate_only = hate_only[hate_only["hate_types"].notna() & (hate_only["hate_types"].str.strip() != "")]
-    hate_only["type_list"] = hate_only["hate_types"].str.split(",").map(lambda lst: [t.strip().lower() for t in lst])
-    exploded = hate_only.explode("type_list")[["month", "type_list"]]
-    type_counts = exploded.groupby(["month", "type_list"]).size().reset_index(name="count")
-    type_pivot = type_counts.pivot(index="month", columns="type_list", values="count").fillna(0).astype(int)
-    type_pivot = type_pivot.reindex(months, fill_value=0)
+    type_pivot = pd.DataFrame(
+        [month_type_counts[m] for m in months], index=months
+    ).fillna(0).astype(int)
 
     type_trend_fig = go.Figure()
     for col in type_pivot.columns:
@@ -438,12 +378,7 @@ def hate_type():
     for the selected month(s).
     """
     # ─── 1) Pull all distinct months from the 'tweets' table ───────────────────────
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT DISTINCT month FROM tweets ORDER BY month")
-    months = [row["month"] for row in cursor.fetchall()]
-    cursor.close()
-    conn.close()
+    months = get_months()
 
     if not months:
         flash("No tweet data available. Please upload data first.", "warning")
@@ -468,39 +403,11 @@ def hate_type():
     else:
         selected_months = [months[-1]]
 
-    # ─── 3) Fetch only hate tweets (hate == 1) for those months ─────────────────
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    if "All" in selected_months:
-        cursor.execute("""
-            SELECT hate_types
-            FROM tweets
-            WHERE hate = 'hate'
-            AND hate_types IS NOT NULL
-            ORDER BY month
-        """)
-    else:
-        placeholder = ",".join(["%s"] * len(selected_months))
-        sql = f"""
-            SELECT hate_types
-            FROM tweets
-            WHERE month IN ({placeholder})
-            AND hate = 'hate'
-            AND hate_types IS NOT NULL
-            ORDER BY month
-        """
-        cursor.execute(sql, selected_months)
-
-    rows = cursor.fetchall()
-    cursor.close()
-    conn.close()
-
-    # Convert to DataFrame (it has a single column: hate_types)
-    df = pd.DataFrame(rows)
+    # ─── 3) Hate-type counts for those months from the monthly stats ───────────
+    label_counts, month_type_counts = fetch_stats(None if "All" in selected_months else selected_months)
 
     # If no hate tweets for those months, render message
-    if df.empty:
+    if not sum(c["hate"] for c in label_counts.values()):
         flash("No hate‐speech data found for the selected month(s).", "info")
         return render_template(
             "visualisation/hate_type.html",
@@ -510,24 +417,10 @@ def hate_type():
             summary_table=[]
         )
 
-    # ─── 4) Explode comma-separated hate_types into individual rows ────────────────
-    # Step A: Split each "hate_types" string into a Python list, stripping whitespace, lowercasing
-    df["type_list"] = (
-        df["hate_types"]
-        .str.split(",") 
-        .map(lambda lst: [t.strip().lower() for t in lst if t.strip()])
-    )
-
-    # Step B: Explode so that each row has exactly one single type in "type_list"
-    exploded = df.explode("type_list")[["type_list"]]
-
-    # Step C: Count occurrences of each hate type
-    type_counts = (
-        exploded
-        .groupby("type_list")
-        .size()
-        .reset_index(name="count")
-        .sort_values("count", ascending=False)
+    # ─── 4) Combine per-month counts into one row per hate type ───────────────────
+    combined = sum(month_type_counts.values(), Counter())
+    type_counts = pd.DataFrame(
+        combined.most_common(), columns=["type_list", "count"]
     )
 
     # If still empty (shouldn’t be, unless all hate_types were blank), handle gracefully
@@ -579,53 +472,9 @@ def hate_type():
     ]
 
     # ─── 7) Keyword Extraction Per Hate Type (Based on selected months) ────────────────
-    import re
-    from collections import defaultdict, Counter
-
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    if "All" in selected_months or selected_months == months:
-        cursor.execute("""
-            SELECT tweet, hate_types
-            FROM tweets
-            WHERE hate = 'hate' AND hate_types IS NOT NULL
-        """)
-    else:
-        placeholder = ",".join(["%s"] * len(selected_months))
-        sql = f"""
-            SELECT tweet, hate_types
-            FROM tweets
-            WHERE hate = 'hate' AND hate_types IS NOT NULL
-            AND month IN ({placeholder})
-        """
-        cursor.execute(sql, selected_months)
-
-    tweets_data = cursor.fetchall()
-    cursor.close()
-    conn.close()
-
-    # Group tweets by hate type
-    type_tweet_map = defaultdict(list)
-    for row in tweets_data:
-        if not row["tweet"] or not row["hate_types"]:
-            continue
-        for t in row["hate_types"].split(","):
-            t_clean = t.strip().lower()
-            if t_clean:
-                type_tweet_map[t_clean].append(row["tweet"])
-
-    # Assuming tweets_data and type_tweet_map already exist
-    type_keywords = {}
-    stop_words = all_stopwords
-
-    for hate_type, tweets in type_tweet_map.items():
-        all_text = " ".join(tweets).lower()
-        # Tokenize with regex (alphabetic only)
-        tokens = re.findall(r"\b[a-zA-Z]{3,}\b", all_text)  # avoid 1–2 letter junk
-        filtered = [t for t in tokens if t not in stop_words]
-        most_common = Counter(filtered).most_common(5)  # top 5 keywords
-        type_keywords[hate_type] = [word for word, count in most_common]
+    #    Merged from the per-(month, hate type) keyword counters kept at ingest
+    show_all = "All" in selected_months or selected_months == months
+    type_keywords = top_type_keywords(None if show_all else selected_months, get_all_stopwords())
 
     # Define cleaner function
     def is_valid_tweet(text):
@@ -638,21 +487,40 @@ def hate_type():
             and "http" not in text
         )
 
-    # Apply filtering
-    type_examples = {}
-
-    for ttype, tweets in type_tweet_map.items():
-        seen = set()
-        clean_tweets = []
-        for tweet in tweets:
-            if tweet in seen:
-                continue
-            if is_valid_tweet(tweet):
-                clean_tweets.append(tweet)
-                seen.add(tweet)
-            if len(clean_tweets) == 3:
-                break
-        type_examples[ttype] = clean_tweets
+    # ─── 8) A few example tweets per hate type, read a small batch at a time ─────────
+    #    Pages through candidates by tweet_id until 3 valid ones are found
+    with get_db_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        where, params = build_filters(None if show_all else selected_months, label="hate")
+
+        type_examples = {}
+        for ttype in type_counts["type_list"]:
+            seen = set()
+            clean_tweets = []
+            last_id = 0
+            while len(clean_tweets) < 3:
+                cursor.execute(f"""
+                    SELECT t.tweet_id, t.tweet
+                    FROM tweets t
+                    WHERE {where} AND {type_filter_sql("t")} AND t.tweet_id > %s
+                    ORDER BY t.tweet_id
+                    LIMIT 50
+                """, params + [ttype, last_id])
+                rows = cursor.fetchall()
+                if not rows:
+                    break
+                last_id = rows[-1]["tweet_id"]
+                for row in rows:
+                    tweet = row["tweet"]
+                    if not tweet or tweet in seen:
+                        continue
+                    if is_valid_tweet(tweet):
+                        clean_tweets.append(tweet)
+                        seen.add(tweet)
+                    if len(clean_tweets) == 3:
+                        break
+            type_examples[ttype] = clean_tweets
+        cursor.close()
 
     # ─── 9) Render the template ──────────────────────────────────────────────────
     return render_template(
@@ -672,12 +540,7 @@ def tweets():
     showing tweet text, month, hate vs. non-hate, and hate_types.
     """
 # 1) Fetch all distinct months to populate the month‐selector
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT DISTINCT month FROM tweets ORDER BY month")
-    months = [row["month"] for row in cursor.fetchall()]
-    cursor.close()
-    conn.close()
+    months = get_months()
 
     if not months:
         flash("No tweet data available. Please upload tweets first.", "warning")
@@ -685,9 +548,10 @@ def tweets():
             "visualisation/tweets.html",
             months=[],
             selected_months=[],
-            tweet_rows=[],
+            filter_months=[],
             summary={},
-            hate_types_list=[]
+            hate_types_list=[],
+            page_size=DEFAULT_PAGE_SIZE
         )
 
     # 2) Determine which months the user selected (or default to the latest)
@@ -703,93 +567,61 @@ def tweets():
     else:
         selected_months = [months[-1]]
         
-    # 3) Query all tweets for those months
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    if "All" in selected_months:
-        cursor.execute("""
-            SELECT 
-                month,
-                tweet,
-                hate,
-                hate_types
-            FROM tweets
-            ORDER BY month DESC
-        """)
-        rows = cursor.fetchall()
-    else:
-        placeholder = ",".join(["%s"] * len(selected_months))
-        sql = f"""
-            SELECT 
-                month,
-                tweet,
-                hate,
-                hate_types
-            FROM tweets
-            WHERE month IN ({placeholder})
-            ORDER BY month DESC
-        """
-        cursor.execute(sql, selected_months)
-        rows = cursor.fetchall()
-
-    cursor.close()
-    conn.close()
-
-    # 4) Post‐process each row:
-    #    - Ensure `hate` is exactly "hate" or "non-hate"
-    #    - Fill hate_types with empty string if None
-    for r in rows:
-        if r["hate"] not in ("hate", "non-hate"):
-            r["hate"] = "non-hate"
-        
-        # NEW: only keep hate_types if the row is truly labeled "hate"
-        if r["hate"] != "hate":
-            # blank it out (so Non‐Hate rows show nothing in that column)
-            r["hate_types"] = ""
-        else:
-            # if it *is* a "hate" row, we leave whatever the DB stored,
-            # or convert None→"" just in case:
-            r["hate_types"] = r["hate_types"] or ""
-
-    # 5) Compute summary statistics (total tweets, hate vs non-hate counts, top hate type)
-    total_tweets = len(rows)
-    hate_count   = sum(1 for r in rows if r["hate"] == "hate")
-    nonhate_count = total_tweets - hate_count
-
-    # Flatten all hate_types for "hate" rows and count frequency
-    all_types = []
-    for r in rows:
-        if r["hate"] == "hate" and r["hate_types"].strip():
-            # split on comma, strip whitespace, lowercase
-            for t in r["hate_types"].split(","):
-                t_clean = t.strip().lower()
-                if t_clean:
-                    all_types.append(t_clean)
-    type_counter = Counter(all_types)
-    if type_counter:
-        top_type, top_count = type_counter.most_common(1)[0]
-    else:
-        top_type, top_count = ("None", 0)
-
-    summary = {
-        "total": total_tweets,
-        "hate": hate_count,
-        "non_hate": nonhate_count,
-        "top_type": top_type.capitalize(),
-        "top_count": top_count
-    }
-
-    # 6) Build a sorted list of all unique hate types (for the Hate Type dropdown)
-    unique_types = sorted(set(all_types))
-
-    # 7) Pass everything into the template
+    # 3) Summary counts come from aggregate queries; the table rows themselves
+    #    are fetched page by page from /visualise/tweets/data as the user scrolls
+    #    ("Show All" selects every month, which needs no month filter at all)
+    show_all = "All" in selected_months or selected_months == months
+    filter_months = [] if show_all else selected_months
+    where, params = build_filters(filter_months)
+    summary = summarize(where, params)
+
+    # 4) Sorted list of hate types present in the selection (for the Hate Type dropdown)
+    unique_types = sorted(name for name, _ in summary.pop("types"))
+
+    # 5) Pass everything into the template
     return render_template(
         "visualisation/tweets.html",
         months=months,
         selected_months=selected_months,
-        tweet_rows=rows,
+        filter_months=filter_months,
         summary=summary,
-        hate_types_list=unique_types
+        hate_types_list=unique_types,
+        page_size=DEFAULT_PAGE_SIZE
     )
 
+@policymaker_bp.route("/visualise/tweets/data")
+def tweets_data():
+    """
+    JSON page of tweets for the tweets table.
+    Query args: month (repeatable), label, type, q (keyword search),
+    min_prob (minimum stored Stage 1 hate probability),
+    sort (id|month|relevance|confidence, default relevance when searching), dir (asc|desc),
+    cursor (from the previous page), limit, summary=1 to also return aggregate
+    counts for the filters.
+    """
+    search = request.args.get("q", "").strip()
+    where, params = build_filters(
+        months=request.args.getlist("month"),
+        label=request.args.get("label"),
+        hate_type=request.args.get("type"),
+        search=search,
+        min_prob=request.args.get("min_prob", type=float)
+    )
+    try:
+        rows, next_cursor = fetch_page(
+            where, params,
+            sort=request.args.get("sort", "relevance" if search else "id"),
+            direction=request.args.get("dir", "desc"),
+            cursor=request.args.get("cursor"),
+            limit=request.args.get("limit", DEFAULT_PAGE_SIZE, type=int),
+            search=search
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    result = {"rows": rows, "next_cursor": next_cursor}
+    if request.args.get("summary") == "1":
+        summary = summarize(where, params)
+        summary.pop("types")
+        result["summary"] = summary
+    return jsonify(result)
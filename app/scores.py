@@ -0,0 +1,133 @@
+import numpy as np
+
+from app.utils import get_db_connection
+
+# Model scores stored with each tweet, so thresholds and confidence filters can
+# be recomputed without re-running inference:
+#   tweets.hate_prob  - Stage 1 softmax probability of "hate" (FLOAT)
+#   tweets.type_probs - the four Stage 2 sigmoid scores as little-endian
+#                       float16, ordered like TYPE_ORDER (BINARY(8)); NULL for
+#                       rows that did not reach Stage 2
+#   tweets.slang_override - 1 when the Malay toxic slang dictionary matched,
+#                       which makes a tweet hate whatever its hate_prob
+#                       (TINYINT(1))
+# All are NULL for rows classified before they were stored.
+# Must match stage_predict.LABELS (not imported here to avoid loading torch).
+TYPE_ORDER = ("Race", "Religion", "Gender", "Sexual_Orientation")
+TYPE_PROBS_DTYPE = np.dtype("<f2")
+
+
+def pack_type_probs(probs):
+    """Pack a {label: score} dict (or None) into the type_probs column value."""
+    if probs is None:
+        return None
+    return np.array([probs[label] for label in TYPE_ORDER], dtype=TYPE_PROBS_DTYPE).tobytes()
+
+
+def unpack_type_probs(blobs):
+    """(n, 4) float32 array from type_probs values; NULL rows become NaN."""
+    out = np.full((len(blobs), len(TYPE_ORDER)), np.nan, dtype=np.float32)
+    for i, blob in enumerate(blobs):
+        if blob is not None:
+            out[i] = np.frombuffer(blob, dtype=TYPE_PROBS_DTYPE)
+    return out
+
+
+def score_columns(scores):
+    """
+    Split predict_toxic_and_hate_type scores into (hate_probs, type_probs,
+    slang_override) column values.
+    """
+    return (
+        [s["hate_prob"] for s in scores],
+        [pack_type_probs(s["type_probs"]) for s in scores],
+        [int(s["slang_override"]) for s in scores],
+    )
+
+
+def fetch_scores(where="1 = 1", params=()):
+    """
+    Scores of the tweets matching `where` (tweets alias `t`, e.g. from
+    tweet_query.build_filters) as NumPy arrays: tweet_id, hate_prob (NaN when
+    not stored), type_probs (n x 4, NaN when not stored or not Stage 2) and
+    slang_override (False when not stored).
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"""SELECT t.tweet_id, t.hate_prob, t.type_probs, t.slang_override
+                FROM tweets t WHERE {where} ORDER BY t.tweet_id""",
+            list(params)
+        )
+        rows = cursor.fetchall()
+        cursor.close()
+
+    return {
+        "tweet_id": np.array([r[0] for r in rows], dtype=np.int64),
+        "hate_prob": np.array([np.nan if r[1] is None else r[1] for r in rows], dtype=np.float32),
+        "type_probs": unpack_type_probs([None if r[2] is None else bytes(r[2]) for r in rows]),
+        "slang_override": np.array([bool(r[3]) for r in rows], dtype=bool),
+    }
+
+
+def relabel(hate_prob, type_probs, hate_threshold=0.5, type_threshold=0.5, slang_override=None):
+    """
+    Re-derive labels from stored scores: a boolean hate array and an (n, 4)
+    boolean hate-type matrix. Rows flagged by the Malay slang override keep
+    their low model probability, so pass slang_override (from fetch_scores)
+    to count them as hate at any threshold, as classification does.
+    """
+    hate = hate_prob >= hate_threshold
+    if slang_override is not None:
+        hate = hate | slang_override
+    with np.errstate(invalid="ignore"):
+        types = (type_probs > type_threshold) & hate[:, None]
+    return hate, types
+
+
+def backfill(batch_size=5000):
+    """
+    Store scores for rows classified before they were kept. Texts without
+    scores are run through the models again (cached ones come from the
+    prediction cache); rows that only lack slang_override get it from the
+    slang matcher. Labels are left as they are. Returns the number of rows
+    updated.
+    """
+    from app.inference_pool import predict
+    from app.text_utils import contains_malay_slang_batch
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        updated, last_id = 0, 0
+        while True:
+            cursor.execute(
+                """SELECT tweet_id, tweet, clean_tweet, hate_prob IS NULL FROM tweets
+                   WHERE tweet_id > %s AND (hate_prob IS NULL OR slang_override IS NULL)
+                   ORDER BY tweet_id
+                   LIMIT %s""",
+                (last_id, batch_size)
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            unscored = [r for r in rows if r[3]]
+            if unscored:
+                _, _, _, scores = predict([r[1] for r in unscored], batch_size=64, return_scores=True)
+                cursor.executemany(
+                    "UPDATE tweets SET hate_prob = %s, type_probs = %s, slang_override = %s WHERE tweet_id = %s",
+                    [(p, b, f, r[0]) for p, b, f, r in zip(*score_columns(scores), unscored)]
+                )
+            # clean_tweet is the preprocessed text the override was matched against
+            scored = [r for r in rows if not r[3]]
+            if scored:
+                flags = contains_malay_slang_batch([r[2] for r in scored])
+                cursor.executemany(
+                    "UPDATE tweets SET slang_override = %s WHERE tweet_id = %s",
+                    [(int(f), r[0]) for f, r in zip(flags, scored)]
+                )
+            conn.commit()
+            updated += len(rows)
+            last_id = rows[-1][0]
+            print(f"🎯 Stored scores for {updated} tweets")
+        cursor.close()
+    return updated
@@ -1,100 +1,422 @@
+import os
+import filecmp
+import threading
 import torch
-from transformers import BertTokenizer, BertForSequenceClassification
-from app.text_utils import preprocess_text_batch, contains_malay_slang
-from typing import List, Dict
-
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-
-# Load Stage 1 (binary: hate vs non-hate)
-stage1_model     = BertForSequenceClassification.from_pretrained(
-    "experiment/stage1/s1_mb_model"
-).to(device)
-stage1_tokenizer = BertTokenizer.from_pretrained(
-    "experiment/stage1/s1_mb_model"
-)
-stage1_model.eval()
-
-# Load Stage 2 (multilabel: hate types)
-stage2_model     = BertForSequenceClassification.from_pretrained(
-    "experiment/stage2/s2_mb_model"
-).to(device)
-stage2_tokenizer = BertTokenizer.from_pretrained(
-    "experiment/stage2/s2_mb_model"
-)
-stage2_model.eval()
+from transformers import BertTokenizerFast, BertForSequenceClassification
+from app.text_utils import preprocess_text_batch, contains_malay_slang_batch
+from app import prediction_cache
+from slangdict.malaytoxicdict import malaytoxicdict
+from typing import List, Dict, Iterator, Optional
+
+STAGE1_DIR = "experiment/stage1/s1_mb_model"
+STAGE2_DIR = "experiment/stage2/s2_mb_model"
+TOKENIZER_FILES = ["vocab.txt", "tokenizer_config.json", "special_tokens_map.json"]
+WEIGHT_FILES = ["model.safetensors", "pytorch_model.bin"]
+
+# Inference backend: "torch" (float32, default), "int8" (dynamic quantization,
+# CPU only) or "onnx" (exported graphs on ONNX Runtime, CPU)
+BACKENDS = ("torch", "int8", "onnx")
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "torch")
+QUANTIZED_FILE = "model_int8.pt"
+ONNX_FILE = "model.onnx"
+ONNX_INPUTS = ["input_ids", "attention_mask", "token_type_ids"]
+# 0 lets ONNX Runtime pick one thread per physical core
+ORT_INTRA_OP_THREADS = int(os.environ.get("ORT_INTRA_OP_THREADS", "0"))
+# Map float32 weights straight from model.safetensors (copy-on-write mmap) so
+# several inference processes on one machine share the same physical pages
+MMAP_WEIGHTS = os.environ.get("INFERENCE_MMAP_WEIGHTS") == "1"
+
+def get_device(backend: str) -> torch.device:
+    # Dynamically quantized Linear layers and the ONNX sessions here are CPU only
+    if backend in ("int8", "onnx") or not torch.cuda.is_available():
+        return torch.device("cpu")
+    return torch.device("cuda")
+
+device = get_device(INFERENCE_BACKEND)
+
+def tokenizers_match(dir1: str, dir2: str) -> bool:
+    """True if both model folders ship byte-identical tokenizer files."""
+    for name in TOKENIZER_FILES:
+        f1, f2 = os.path.join(dir1, name), os.path.join(dir2, name)
+        if os.path.exists(f1) != os.path.exists(f2):
+            return False
+        if os.path.exists(f1) and not filecmp.cmp(f1, f2, shallow=False):
+            return False
+    return True
+
+def _weights_mtime(model_dir: str) -> float:
+    paths = [os.path.join(model_dir, f) for f in WEIGHT_FILES + ["config.json"]]
+    return max((os.path.getmtime(p) for p in paths if os.path.exists(p)), default=0.0)
+
+def quantize_model(model_dir: str):
+    """
+    Quantize every Linear layer of a fine-tuned model to int8 and cache the
+    result as model_int8.pt next to the float weights.
+    """
+    model = BertForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+    qmodel = torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    torch.save(qmodel, os.path.join(model_dir, QUANTIZED_FILE))
+    return qmodel
+
+def load_quantized_model(model_dir: str):
+    """Load the cached int8 model, re-quantizing only if the float weights are newer."""
+    path = os.path.join(model_dir, QUANTIZED_FILE)
+    if not os.path.exists(path) or os.path.getmtime(path) < _weights_mtime(model_dir):
+        print(f"Quantizing {model_dir} to int8...")
+        qmodel = quantize_model(model_dir)
+    else:
+        qmodel = torch.load(path, weights_only=False)
+    qmodel.eval()
+    return qmodel
+
+def export_onnx(model_dir: str, opset: int = 17) -> str:
+    """
+    Export a fine-tuned model to model.onnx with dynamic batch and sequence
+    axes, so one graph serves every length bucket.
+    """
+    model = BertForSequenceClassification.from_pretrained(model_dir)
+    model.eval()
+    model.config.return_dict = False
+    path = os.path.join(model_dir, ONNX_FILE)
+    dummy = torch.ones(1, 8, dtype=torch.long)
+    dynamic = {0: "batch", 1: "sequence"}
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy, torch.ones_like(dummy), torch.zeros_like(dummy)),
+            path,
+            input_names=ONNX_INPUTS,
+            output_names=["logits"],
+            dynamic_axes={name: dynamic for name in ONNX_INPUTS + ["logits"]},
+            opset_version=opset
+        )
+    return path
+
+def load_onnx_session(model_dir: str):
+    """Open an ONNX Runtime CPU session, exporting the graph first if it is missing or stale."""
+    try:
+        import onnxruntime as ort
+    except ImportError:
+        raise RuntimeError("INFERENCE_BACKEND=onnx requires the onnxruntime package (pip install onnxruntime)")
+
+    path = os.path.join(model_dir, ONNX_FILE)
+    if not os.path.exists(path) or os.path.getmtime(path) < _weights_mtime(model_dir):
+        print(f"Exporting {model_dir} to ONNX...")
+        export_onnx(model_dir)
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = ORT_INTRA_OP_THREADS
+    options.inter_op_num_threads = 1
+    return ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+
+def map_weights(model, model_dir: str):
+    """
+    Replace the model's parameters with tensors viewing a memory map of
+    model.safetensors. Pages are only read, so every process mapping the
+    same file shares them through the page cache.
+    """
+    path = os.path.join(model_dir, "model.safetensors")
+    if not os.path.exists(path):
+        print(f"⚠️ {model_dir} has no model.safetensors, weights are not memory-mapped")
+        return model
+    from safetensors import safe_open
+
+    with safe_open(path, framework="pt", device="cpu") as f:
+        state = {key: f.get_tensor(key) for key in f.keys()}
+    result = model.load_state_dict(state, strict=False, assign=True)
+    params = dict(model.named_parameters())
+    missing = [k for k in result.missing_keys if k in params]
+    if missing:
+        print(f"⚠️ {len(missing)} parameters of {model_dir} are not memory-mapped, e.g. {missing[0]}")
+    return model
+
+def load_classifier(model_dir: str, backend: str = INFERENCE_BACKEND):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend '{backend}', expected one of {BACKENDS}")
+    if backend == "int8":
+        return load_quantized_model(model_dir)
+    if backend == "onnx":
+        return load_onnx_session(model_dir)
+    device = get_device(backend)
+    model = BertForSequenceClassification.from_pretrained(model_dir)
+    if MMAP_WEIGHTS and device.type == "cpu":
+        map_weights(model, model_dir)
+    model = model.to(device)
+    model.eval()
+    return model
+
+def load_models(backend: str = INFERENCE_BACKEND) -> dict:
+    """Load both stages and their tokenizer(s) for the given backend."""
+    tokenizer1 = BertTokenizerFast.from_pretrained(STAGE1_DIR)
+    # Both stages are fine-tuned from the same mBERT vocab; when the tokenizer
+    # files match, Stage 2 reuses the Stage 1 encodings instead of re-tokenizing.
+    shared = tokenizers_match(STAGE1_DIR, STAGE2_DIR)
+    tokenizer2 = tokenizer1 if shared else BertTokenizerFast.from_pretrained(STAGE2_DIR)
+    return {
+        "backend": backend,
+        "device": get_device(backend),
+        "stage1_model": load_classifier(STAGE1_DIR, backend),  # binary: hate vs non-hate
+        "stage1_tokenizer": tokenizer1,
+        "stage2_model": load_classifier(STAGE2_DIR, backend),  # multilabel: hate types
+        "stage2_tokenizer": tokenizer2,
+        "shared_tokenizer": shared,
+        # Keys the prediction cache; also covers the slang override dictionary
+        "fingerprint": prediction_cache.model_fingerprint(
+            [
+                os.path.join(d, f)
+                for d in (STAGE1_DIR, STAGE2_DIR)
+                for f in WEIGHT_FILES + TOKENIZER_FILES + ["config.json"]
+            ],
+            backend,
+            extra="|".join(sorted(malaytoxicdict))
+        ),
+    }
+
+# Models are loaded on first use rather than at import, so processes that
+# never classify (e.g. dashboard-only workers) don't pay for ~700MB of weights.
+loaded_models: Optional[dict] = None
+_models_lock = threading.Lock()
+
+def get_models() -> dict:
+    """Return the default model bundle, loading it once in a thread-safe way."""
+    global loaded_models
+    if loaded_models is None:
+        with _models_lock:
+            if loaded_models is None:
+                loaded_models = load_models(INFERENCE_BACKEND)
+    return loaded_models
+
+def warm_up():
+    """Load the models and run one tiny batch so the first upload doesn't pay for it."""
+    predict_toxic_and_hate_type(["warm up"])
 
 # Hate-type labels
 LABELS = ["Race", "Religion", "Gender", "Sexual_Orientation"]
 
+MAX_LENGTH = 128
+MAX_BATCH_ROWS = 512  # hard cap so a budget of very short tweets stays reasonable
+
+def _encode(tokenizer, texts: List[str]) -> List[List[int]]:
+    """Tokenize once without padding; padding is applied per length bucket."""
+    return tokenizer(texts, truncation=True, max_length=MAX_LENGTH)["input_ids"]
+
+def _length_batches(lengths: List[int], max_tokens: int) -> Iterator[List[int]]:
+    """
+    Yield lists of indices sorted by token length, each packed so that
+    rows x longest row stays within max_tokens (the padded batch size).
+    """
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    batch: List[int] = []
+    for idx in order:
+        # Sorted ascending, so the new row is always the longest in the batch
+        if batch and (
+            lengths[idx] * (len(batch) + 1) > max_tokens
+            or len(batch) >= MAX_BATCH_ROWS
+        ):
+            yield batch
+            batch = []
+        batch.append(idx)
+    if batch:
+        yield batch
+
+def _run_batch(models: dict, stage: int, input_ids: List[List[int]]) -> torch.Tensor:
+    """Pad one length bucket and return the stage's logits as a CPU tensor."""
+    model = models[f"stage{stage}_model"]
+    tokenizer = models[f"stage{stage}_tokenizer"]
+
+    if models["backend"] == "onnx":
+        inputs = tokenizer.pad({"input_ids": input_ids}, return_tensors="np")
+        feed = {
+            "input_ids": inputs["input_ids"].astype("int64"),
+            "attention_mask": inputs["attention_mask"].astype("int64"),
+        }
+        feed["token_type_ids"] = feed["input_ids"] * 0
+        return torch.from_numpy(model.run(["logits"], feed)[0])
+
+    inputs = tokenizer.pad({"input_ids": input_ids}, return_tensors="pt")
+    inputs = {k: v.to(models["device"]) for k, v in inputs.items()}
+    with torch.no_grad():
+        return model(**inputs).logits.cpu()
+
+def _classify(
+    cleaned_texts: List[str],
+    max_tokens: int,
+    models: dict
+) -> tuple[List[int], Dict[int, List[str]], List[float], Dict[int, List[float]], List[bool]]:
+    """
+    Run both stages over already-preprocessed texts. Besides the labels,
+    returns the Stage 1 hate probability per text, the Stage 2 sigmoid
+    scores (ordered like LABELS) for texts that reached Stage 2 and whether
+    the Malay toxic slang override matched each text.
+    """
+    stage1_tokenizer, stage2_tokenizer = models["stage1_tokenizer"], models["stage2_tokenizer"]
+
+    # Malay toxic slang override flags, one scan per tweet. The matcher applies
+    # the same lowercasing/whitespace collapsing as preprocess_text.
+    slang_flags = contains_malay_slang_batch(cleaned_texts)
+
+    # Stage 1: Binary hate detection
+    all_preds1: List[int] = [0] * len(cleaned_texts)
+    hate_probs: List[float] = [0.0] * len(cleaned_texts)
+    encoded1 = _encode(stage1_tokenizer, cleaned_texts)
+
+    for batch_idx in _length_batches([len(ids) for ids in encoded1], max_tokens):
+        logits1 = _run_batch(models, 1, [encoded1[i] for i in batch_idx])
+        batch_preds = torch.argmax(logits1, dim=1).tolist()
+        batch_probs = torch.softmax(logits1.float(), dim=1)[:, 1].tolist()
+
+        # Scatter back to original positions, applying the Malay toxic slang override
+        for text_idx, pred, prob in zip(batch_idx, batch_preds, batch_probs):
+            if pred == 0 and slang_flags[text_idx]:
+                pred = 1
+            all_preds1[text_idx] = pred
+            hate_probs[text_idx] = prob
+
+    # Stage 2: Hate type detection
+    hate_indices = [idx for idx, p in enumerate(all_preds1) if p == 1]
+    hate_type_dict: Dict[int, List[str]] = {}
+    type_probs: Dict[int, List[float]] = {}
+
+    if hate_indices:
+        if models["shared_tokenizer"]:
+            encoded2 = [encoded1[idx] for idx in hate_indices]
+        else:
+            toxic_cleaned = [cleaned_texts[idx] for idx in hate_indices]
+            encoded2 = _encode(stage2_tokenizer, toxic_cleaned)
+
+        for batch_idx in _length_batches([len(ids) for ids in encoded2], max_tokens):
+            logits2 = _run_batch(models, 2, [encoded2[i] for i in batch_idx])
+            probs2 = torch.sigmoid(logits2.float())
+
+            for j, row in zip(batch_idx, probs2.tolist()):
+                orig_idx = hate_indices[j]
+                chosen = [LABELS[k] for k, v in enumerate(row) if v > 0.5]  # simple >0.5 cutoff
+                hate_type_dict[orig_idx] = chosen if chosen else ["Other_Hate"]
+                type_probs[orig_idx] = row
+
+    return all_preds1, hate_type_dict, hate_probs, type_probs, slang_flags
+
 def predict_toxic_and_hate_type(
-    texts: List[str], 
-    batch_size: int = 32
-) -> tuple[List[int], Dict[int, List[str]], List[str]]:
+    texts: List[str],
+    batch_size: int = 32,
+    max_tokens: Optional[int] = None,
+    models: Optional[dict] = None,
+    use_cache: bool = True,
+    return_scores: bool = False
+) -> tuple:
     """
     Predict hate and hate types for a batch of texts.
 
+    Identical tweets (after preprocessing) are classified once per call, and
+    results are looked up in / saved to the on-disk prediction cache, so
+    retweets and spam repeated across uploads skip both BERT stages.
+
+    The remaining texts are tokenized once, sorted by token length and packed
+    into batches of at most max_tokens padded tokens (default batch_size x 128),
+    so short tweets are no longer padded up to the longest one in file order.
+    Pass a bundle from load_models() to run a backend other than the default.
+
     Returns:
     - all_preds1: List[int], 0 = non-hate, 1 = hate
     - hate_type_dict: Dict[int, List[str]], indices -> hate types
     - cleaned_texts: List[str], preprocessed tweets
+    - scores (only with return_scores=True): List[dict] per text with
+      "hate_prob" (Stage 1), "type_probs" ({label: sigmoid score}, or
+      None when the text did not reach Stage 2) and "slang_override" (the
+      Malay toxic slang dictionary matched, so the text is hate whatever
+      its hate_prob)
     """
 
     if not texts:
-        return [], {}, []
+        return ([], {}, [], []) if return_scores else ([], {}, [])
+
+    if max_tokens is None:
+        max_tokens = batch_size * MAX_LENGTH
+    if models is None:
+        models = get_models()
 
     # Preprocess tweets
     cleaned_texts = preprocess_text_batch(texts)
 
-    # Stage 1: Binary hate detection
-    all_preds1: List[int] = []
+    # Deduplicate within the call, then check the persistent cache
+    unique_texts = list(dict.fromkeys(cleaned_texts))
+    keys = [prediction_cache.text_key(t) for t in unique_texts]
+    use_cache = use_cache and prediction_cache.CACHE_ENABLED
+    results = prediction_cache.get_many(keys, models["fingerprint"]) if use_cache else {}
 
-    for i in range(0, len(cleaned_texts), batch_size):
-        batch_cleaned = cleaned_texts[i : i + batch_size]
-        inputs1 = stage1_tokenizer(
-            batch_cleaned,
-            return_tensors="pt",
-            padding=True,
-            truncation=True,
-            max_length=128
+    # Entries cached before scores (and the slang flag) were stored only count
+    # as hits for labels
+    missing = [
+        i for i, key in enumerate(keys)
+        if key not in results or (return_scores and "slang" not in results[key])
+    ]
+    if missing:
+        preds, types, hate_probs, type_probs, slang_flags = _classify(
+            [unique_texts[i] for i in missing], max_tokens, models
         )
-        inputs1 = {k: v.to(device) for k, v in inputs1.items()}
+        fresh = {
+            keys[i]: {
+                "hate": preds[j],
+                "hate_types": types.get(j, []),
+                "hate_prob": round(hate_probs[j], 4),
+                "type_probs": [round(p, 4) for p in type_probs[j]] if j in type_probs else None,
+                "slang": bool(slang_flags[j]),
+            }
+            for j, i in enumerate(missing)
+        }
+        if use_cache:
+            prediction_cache.put_many(fresh, models["fingerprint"])
+        results.update(fresh)
 
-        with torch.no_grad():
-            logits1 = stage1_model(**inputs1).logits
-            batch_preds = torch.argmax(logits1, dim=1).cpu().tolist()
+    # Expand back to one result per input row
+    by_text = {t: results[key] for t, key in zip(unique_texts, keys)}
+    all_preds1: List[int] = []
+    hate_type_dict: Dict[int, List[str]] = {}
+    scores: List[dict] = []
+    for idx, text in enumerate(cleaned_texts):
+        result = by_text[text]
+        all_preds1.append(result["hate"])
+        if result["hate"] == 1:
+            hate_type_dict[idx] = list(result["hate_types"])
+        if return_scores:
+            probs = result["type_probs"]
+            scores.append({
+                "hate_prob": result["hate_prob"],
+                "type_probs": dict(zip(LABELS, probs)) if probs is not None else None,
+                "slang_override": result["slang"],
+            })
 
-        # Apply Malay toxic slang override
-        for j, text_idx in enumerate(range(i, i + len(batch_cleaned))):
-            if batch_preds[j] == 0 and contains_malay_slang(texts[text_idx]):
-                batch_preds[j] = 1
+    if return_scores:
+        return all_preds1, hate_type_dict, cleaned_texts, scores
+    return all_preds1, hate_type_dict, cleaned_texts
 
-        all_preds1.extend(batch_preds)
+def compare_backends(texts: List[str], backend: str, reference: str = "torch", batch_size: int = 64) -> dict:
+    """
+    Run the same texts through two backends and report how often they agree.
+    Used to check a faster backend against the float32 models before enabling it.
+    """
+    current = INFERENCE_BACKEND
+    ref_models = get_models() if current == reference else load_models(reference)
+    alt_models = get_models() if current == backend else load_models(backend)
 
-    # Stage 2: Hate type detection
-    hate_indices = [idx for idx, p in enumerate(all_preds1) if p == 1]
-    hate_type_dict: Dict[int, List[str]] = {}
+    ref_preds, ref_types, _ = predict_toxic_and_hate_type(texts, batch_size, models=ref_models, use_cache=False)
+    alt_preds, alt_types, _ = predict_toxic_and_hate_type(texts, batch_size, models=alt_models, use_cache=False)
 
-    if hate_indices:
-        toxic_cleaned = [cleaned_texts[idx] for idx in hate_indices]
-
-        for i in range(0, len(toxic_cleaned), batch_size):
-            batch_cleaned = toxic_cleaned[i : i + batch_size]
-            inputs2 = stage2_tokenizer(
-                batch_cleaned,
-                return_tensors="pt",
-                padding=True,
-                truncation=True,
-                max_length=128
-            )
-            inputs2 = {k: v.to(device) for k, v in inputs2.items()}
-
-            with torch.no_grad():
-                logits2 = stage2_model(**inputs2).logits
-                probs2 = torch.sigmoid(logits2).cpu()
-
-            for j, row in enumerate(probs2):
-                orig_idx = hate_indices[i + j]
-                chosen = [LABELS[k] for k, v in enumerate(row) if v > 0.5]  # simple >0.5 cutoff
-                hate_type_dict[orig_idx] = chosen if chosen else ["Other_Hate"]
+    total = len(texts)
+    stage1_agree = sum(1 for a, b in zip(ref_preds, alt_preds) if a == b)
+    both_hate = [i for i in range(total) if ref_preds[i] == 1 and alt_preds[i] == 1]
+    stage2_agree = sum(1 for i in both_hate if set(ref_types[i]) == set(alt_types[i]))
 
-    return all_preds1, hate_type_dict, cleaned_texts
+    return {
+        "rows": total,
+        "stage1_agreement": stage1_agree / total if total else 1.0,
+        "stage2_agreement": stage2_agree / len(both_hate) if both_hate else 1.0,
+        "reference_hate": sum(ref_preds),
+        "backend_hate": sum(alt_preds),
+        "reference_preds": ref_preds,
+        "backend_preds": alt_preds,
+    }
@@ -43,14 +43,84 @@ def preprocess_text(text: str) -> str:
 def preprocess_text_batch(texts):
     return [preprocess_text(t) for t in texts]
 
+# Malay toxic slang matcher
+# All dictionary entries are compiled into one alternation, longest first, so a
+# single left-to-right scan finds every slang term instead of one regex per entry.
+# The lookahead lets matches that start inside an earlier one (e.g. "babi" inside
+# "cina babi") still be reported for auditing. The alternation only yields the
+# longest term at each position, so for auditing the other terms starting there
+# (e.g. "bodoh" in "bodoh piang") are looked up by their first word.
+_slang_pattern = None
+_slang_snapshot = frozenset()
+_slang_by_first_word = {}
+_FIRST_WORD_RE = re.compile(r"\w+")
+
+def _first_word(text, pos=0):
+    m = _FIRST_WORD_RE.match(text, pos)
+    return m.group(0) if m else ""
+
+def refresh_slang_matcher():
+    """Rebuild the compiled slang pattern from the current malaytoxicdict."""
+    global _slang_pattern, _slang_snapshot, _slang_by_first_word
+    _slang_snapshot = frozenset(malaytoxicdict)
+    terms = sorted(_slang_snapshot, key=lambda w: (-len(w), w))
+    by_first_word = {}
+    for w in terms:
+        by_first_word.setdefault(_first_word(w), []).append((w, re.compile(re.escape(w) + r"\b")))
+    _slang_by_first_word = by_first_word
+    if terms:
+        alternation = "|".join(re.escape(w) for w in terms)
+        _slang_pattern = re.compile(r"\b(?=(" + alternation + r")\b)")
+    else:
+        _slang_pattern = None
+    return _slang_pattern
+
+def _get_slang_pattern():
+    # Cheap staleness check; call refresh_slang_matcher() after in-place edits
+    # that keep the dictionary size unchanged.
+    if len(malaytoxicdict) != len(_slang_snapshot):
+        refresh_slang_matcher()
+    return _slang_pattern
+
+refresh_slang_matcher()
+
+def find_malay_slang(text: str) -> list:
+    """
+    Return the toxic Malay slang terms found in text, in order of appearance.
+    """
+    pattern = _get_slang_pattern()
+    if pattern is None or not isinstance(text, str):
+        return []
+    text = re.sub(r'\s+', ' ', text.lower()).strip()
+    by_first_word = _slang_by_first_word
+    found = []
+    for m in pattern.finditer(text):
+        # Every term matching here, longest first. A shorter term ending on a
+        # word boundary inside the first word would be that whole word, so
+        # only terms with the same first word (or none) can match.
+        pos = m.start()
+        candidates = by_first_word.get(_first_word(text, pos), []) + by_first_word.get("", [])
+        for term, term_re in candidates:
+            if term not in found and term_re.match(text, pos):
+                found.append(term)
+    return found
+
+def find_malay_slang_batch(texts) -> list:
+    """
+    Return one list of matched slang terms per input text.
+    """
+    return [find_malay_slang(t) for t in texts]
+
 # Malay toxic slang checker
 def contains_malay_slang(text: str) -> bool:
     """
     Return True if any toxic Malay slang word is present.
     """
-    text = text.lower()
-    text = re.sub(r'\s+', ' ', text).strip()
-    for slang in malaytoxicdict:
-        if re.search(r"\b" + re.escape(slang) + r"\b", text):
-            return True
-    return False
+    pattern = _get_slang_pattern()
+    if pattern is None or not isinstance(text, str):
+        return False
+    text = re.sub(r'\s+', ' ', text.lower()).strip()
+    return pattern.search(text) is not None
+
+def contains_malay_slang_batch(texts) -> list:
+    return [contains_malay_slang(t) for t in texts]
@@ -0,0 +1,189 @@
+import base64
+import json
+import re
+
+from app.utils import get_db_connection
+from app.hate_types import type_filter_sql
+
+# Filtered, keyset-paginated reads of the tweets table for the tweets view.
+# Pages are ordered by (sort column, tweet_id) and continue from an opaque
+# cursor holding the last row's sort key, so deep pages cost the same as the
+# first one and no OFFSET scan is needed.
+
+SORTS = {
+    "id": "t.tweet_id",
+    "month": "t.month",
+    "relevance": None,  # full-text score, only meaningful with a search
+    "confidence": "COALESCE(ROUND(t.hate_prob, 4), -1)",  # Stage 1 probability, rows without scores last
+}
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Keyword search uses the FULLTEXT index on (tweet, clean_tweet). Words shorter
+# than InnoDB's default innodb_ft_min_token_size are not indexed, so a search
+# made only of such words falls back to a substring scan.
+FULLTEXT_COLUMNS = "t.tweet, t.clean_tweet"
+FULLTEXT_MIN_WORD = 3
+
+
+def _escape_like(value):
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def fulltext_query(search):
+    """Boolean-mode query requiring every word (as a prefix), or None if unusable."""
+    words = [w for w in re.findall(r"\w+", search or "") if len(w) >= FULLTEXT_MIN_WORD]
+    if not words:
+        return None
+    return " ".join(f"+{w}*" for w in words)
+
+
+def relevance_sql(search):
+    """Return (expr, params) scoring rows against `search`, or (None, []) if no index query."""
+    query = fulltext_query(search)
+    if query is None:
+        return None, []
+    return f"MATCH({FULLTEXT_COLUMNS}) AGAINST(%s IN BOOLEAN MODE)", [query]
+
+
+def build_filters(months=None, label=None, hate_type=None, search=None, min_prob=None):
+    """
+    Return (where_sql, params) for the tweets alias `t`. `min_prob` keeps rows
+    whose stored Stage 1 hate probability is at least that value.
+    """
+    clauses, params = [], []
+    if months:
+        clauses.append(f"t.month IN ({','.join(['%s'] * len(months))})")
+        params.extend(months)
+    if label in ("hate", "non-hate"):
+        clauses.append("t.hate = %s")
+        params.append(label)
+    if hate_type:
+        clauses.append(type_filter_sql("t"))
+        params.append(hate_type.strip().lower())
+    if search:
+        expr, expr_params = relevance_sql(search)
+        if expr:
+            clauses.append(expr)
+            params.extend(expr_params)
+        else:
+            clauses.append("t.tweet LIKE %s")
+            params.append(f"%{_escape_like(search)}%")
+    if min_prob is not None:
+        clauses.append("t.hate_prob >= %s")
+        params.append(min_prob)
+    return (" AND ".join(clauses) or "1 = 1"), params
+
+
+def encode_cursor(sort_value, tweet_id):
+    raw = json.dumps([sort_value, tweet_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor):
+    try:
+        sort_value, tweet_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return sort_value, int(tweet_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def fetch_page(where, params, sort="id", direction="desc", cursor=None,
+               limit=DEFAULT_PAGE_SIZE, search=None):
+    """
+    Return (rows, next_cursor) for one page. next_cursor is None on the
+    last page. sort="relevance" ranks by full-text score for `search` (and
+    falls back to "id" without one); rows then carry a "score".
+    Raises ValueError for an unknown sort or a bad cursor.
+    """
+    if sort not in SORTS:
+        raise ValueError(f"Unknown sort '{sort}', expected one of {tuple(SORTS)}")
+    column, column_params = SORTS[sort], []
+    if sort == "relevance":
+        column, column_params = relevance_sql(search)
+        if column is None:
+            sort, column = "id", SORTS["id"]
+    desc = direction != "asc"
+    op = "<" if desc else ">"
+    order = "DESC" if desc else "ASC"
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+    params = list(params)
+    if cursor:
+        sort_value, last_id = decode_cursor(cursor)
+        if sort == "id":
+            where += f" AND t.tweet_id {op} %s"
+            params.append(last_id)
+        else:
+            where += f" AND ({column} {op} %s OR ({column} = %s AND t.tweet_id {op} %s))"
+            params.extend(column_params + [sort_value] + column_params + [sort_value, last_id])
+
+    with get_db_connection() as conn:
+        cur = conn.cursor(dictionary=True)
+        cur.execute(f"""
+            SELECT t.tweet_id, t.month, t.tweet, t.hate, t.hate_types, t.hate_prob, {column} AS sort_key
+            FROM tweets t
+            WHERE {where}
+            ORDER BY sort_key {order}, t.tweet_id {order}
+            LIMIT %s
+        """, column_params + params + [limit + 1])
+        rows = cur.fetchall()
+        cur.close()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last["sort_key"], last["tweet_id"])
+
+    for r in rows:
+        sort_key = r.pop("sort_key")
+        if sort == "relevance":
+            r["score"] = float(sort_key)
+        # Only hate rows carry hate types in the table
+        if r["hate"] != "hate":
+            r["hate"] = "non-hate"
+            r["hate_types"] = ""
+        else:
+            r["hate_types"] = r["hate_types"] or ""
+    return rows, next_cursor
+
+
+def summarize(where, params):
+    """
+    Aggregate counts for the filtered tweets:
+    {"total", "hate", "non_hate", "top_type", "top_count", "types": [(name, n), ...]}
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f"""
+            SELECT t.hate, COUNT(*) AS n
+            FROM tweets t
+            WHERE {where}
+            GROUP BY t.hate
+        """, params)
+        label_totals = {row["hate"]: int(row["n"]) for row in cursor.fetchall()}
+
+        cursor.execute(f"""
+            SELECT ht.type_name, COUNT(*) AS n
+            FROM tweets t
+            JOIN tweet_hate_type x ON x.tweet_id = t.tweet_id
+            JOIN hate_type ht ON ht.type_id = x.type_id
+            WHERE t.hate = 'hate' AND {where}
+            GROUP BY ht.type_name
+            ORDER BY n DESC
+        """, params)
+        types = [(row["type_name"], int(row["n"])) for row in cursor.fetchall()]
+        cursor.close()
+
+    hate_count = label_totals.get("hate", 0)
+    total = sum(label_totals.values())
+    top_type, top_count = types[0] if types else ("None", 0)
+    return {
+        "total": total,
+        "hate": hate_count,
+        "non_hate": total - hate_count,
+        "top_type": top_type.capitalize(),
+        "top_count": top_count,
+        "types": types,
+    }
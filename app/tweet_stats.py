@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from flask import current_app
+
+from app.utils import get_db_connection
+
+# Pre-aggregated counts in tweet_monthly_stats, one row per
+# (month, hate label, hate type). hate_type '' holds the number of tweets with
+# that label; other rows count hate-type mentions (lowercased, as displayed).
+# Maintained by the upload job and rebuilt with `flask --app run rebuild-monthly-stats`
+# (see rebuild_tables for how rebuilds avoid racing uploads).
+# Its label-total rows double as the catalog of available months.
+TOTAL = ""
+STATS_TABLE = "tweet_monthly_stats"
+
+UPSERT_SQL = """
+    INSERT INTO {table} (month, hate, hate_type, tweet_count)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE tweet_count = tweet_count + VALUES(tweet_count)
+"""
+
+
+class RebuildConflict(Exception):
+    pass
+
+
+def split_types(hate_types):
+    return [t.strip().lower() for t in str(hate_types or "").split(",") if t.strip()]
+
+
+def count_rows(months, hate_labels, hate_types):
+    """Count (month, label, type) keys for parallel lists of classified rows."""
+    counts = Counter()
+    for month, label, types in zip(months, hate_labels, hate_types):
+        counts[(month, label, TOTAL)] += 1
+        if label == "hate":
+            for t in split_types(types):
+                counts[(month, label, t)] += 1
+    return counts
+
+
+def apply_counts(cursor, counts, table=STATS_TABLE):
+    """Add counts to the stats table using the caller's cursor/transaction."""
+    if counts:
+        cursor.executemany(UPSERT_SQL.format(table=table), [key + (n,) for key, n in counts.items()])
+
+
+def scan_tweets(columns, batch_size):
+    """Yield lists of rows of `columns` from tweets, batch_size at a time, on a dedicated connection."""
+    conn = get_db_connection()
+    cursor = conn.cursor(buffered=False)
+    try:
+        cursor.execute(f"SELECT {', '.join(columns)} FROM tweets")
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def rebuild_tables(tables, fill):
+    """
+    Rebuild the aggregate `tables` from tweets without racing the upload job,
+    which adds to them in each chunk's transaction. Refuses to start while an
+    upload is running; fill(conn, staging) writes into empty copies
+    (staging maps each table to its copy), and the copies replace the tables
+    in one atomic RENAME TABLE unless an upload started in the meantime.
+    Raises RebuildConflict in both cases.
+    """
+    from app import jobs
+
+    started = datetime.now()
+    if jobs.uploads_active():
+        raise RebuildConflict("Upload jobs are running; rebuild once they have finished.")
+
+    staging = {table: f"{table}_rebuild" for table in tables}
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        for table, copy in staging.items():
+            cursor.execute(f"DROP TABLE IF EXISTS {copy}")
+            cursor.execute(f"CREATE TABLE {copy} LIKE {table}")
+        fill(conn, staging)
+        conn.commit()
+
+        if jobs.uploads_active(since=started):
+            raise RebuildConflict("An upload started during the rebuild; run it again once uploads have finished.")
+        cursor.execute("RENAME TABLE " + ", ".join(
+            f"{table} TO {table}_old, {copy} TO {table}" for table, copy in staging.items()
+        ))
+        for table in tables:
+            cursor.execute(f"DROP TABLE {table}_old")
+    finally:
+        for copy in staging.values():
+            cursor.execute(f"DROP TABLE IF EXISTS {copy}")
+        cursor.close()
+        conn.close()
+
+
+def rebuild_stats(batch_size=50_000):
+    """Recompute tweet_monthly_stats from the tweets table (see rebuild_tables)."""
+    def fill(conn, staging):
+        cursor = conn.cursor()
+        for rows in scan_tweets(("month", "hate", "hate_types"), batch_size):
+            apply_counts(cursor, count_rows(*zip(*rows)), table=staging[STATS_TABLE])
+            conn.commit()
+        cursor.close()
+
+    rebuild_tables([STATS_TABLE], fill)
+    invalidate_months()
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM {STATS_TABLE}")
+        (keys,) = cursor.fetchone()
+        cursor.close()
+    return keys
+
+
+# "generation" is bumped by invalidate_months(), so a query that was already
+# running when the months changed does not store its outdated result
+_months_cache = {"months": None, "expires": 0.0, "generation": 0}
+_months_lock = threading.Lock()
+
+
+def get_months():
+    """
+    Sorted list of months that have tweets, cached in-process for
+    MONTHS_CACHE_TTL seconds and dropped early by invalidate_months().
+    """
+    with _months_lock:
+        if _months_cache["months"] is not None and time.monotonic() < _months_cache["expires"]:
+            return list(_months_cache["months"])
+        generation = _months_cache["generation"]
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT DISTINCT month FROM tweet_monthly_stats WHERE hate_type = %s AND tweet_count > 0 ORDER BY month",
+            (TOTAL,)
+        )
+        months = [row[0] for row in cursor.fetchall()]
+        cursor.close()
+
+    with _months_lock:
+        if _months_cache["generation"] == generation:
+            _months_cache["months"] = months
+            _months_cache["expires"] = time.monotonic() + current_app.config.get("MONTHS_CACHE_TTL", 300)
+    return list(months)
+
+
+def invalidate_months():
+    """Forget the cached months (other processes pick up changes after the TTL)."""
+    with _months_lock:
+        _months_cache["months"] = None
+        _months_cache["generation"] += 1
+
+
+def fetch_stats(months=None):
+    """
+    Return (label_counts, type_counts) for the given months (all if None):
+    label_counts[month] = {"hate": n, "non-hate": n}
+    type_counts[month] = Counter({hate_type: n})
+    """
+    with get_db_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        sql = "SELECT month, hate, hate_type, tweet_count FROM tweet_monthly_stats"
+        if months:
+            placeholder = ",".join(["%s"] * len(months))
+            cursor.execute(f"{sql} WHERE month IN ({placeholder})", list(months))
+        else:
+            cursor.execute(sql)
+        rows = cursor.fetchall()
+        cursor.close()
+
+    label_counts, type_counts = {}, {}
+    for m in months or []:
+        label_counts[m] = {"hate": 0, "non-hate": 0}
+        type_counts[m] = Counter()
+    for row in rows:
+        m = row["month"]
+        label_counts.setdefault(m, {"hate": 0, "non-hate": 0})
+        type_counts.setdefault(m, Counter())
+        if row["hate_type"] == TOTAL:
+            label_counts[m][row["hate"]] = int(row["tweet_count"])
+        elif row["hate"] == "hate":
+            type_counts[m][row["hate_type"]] += int(row["tweet_count"])
+    return label_counts, type_counts
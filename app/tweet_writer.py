@@ -0,0 +1,172 @@
+import os
+import tempfile
+import time
+
+import mysql.connector
+from flask import current_app
+
+from app.utils import get_db_connection
+
+# Writers for classified tweet chunks:
+#   executemany - 2000-row executemany slices, commit after each (original behaviour)
+#   multirow    - multi-row INSERT ... VALUES statements sized by bytes
+#   loaddata    - stream the chunk to a temp TSV and LOAD DATA LOCAL INFILE it
+# Each chunk is committed once its rows (and any `after` writes) are in; with
+# single_transaction the whole file is committed once at the end instead.
+WRITERS = ("executemany", "multirow", "loaddata")
+EXECUTEMANY_BATCH = 2000
+MULTIROW_MAX_BYTES = 4 * 1024 * 1024  # well under MariaDB's default 16MB max_allowed_packet
+
+# MySQL error numbers meaning LOAD DATA LOCAL is disabled on the client or server
+LOCAL_INFILE_ERRORS = {1148, 2068, 3948}
+
+
+def _tsv_field(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, bytes):
+        return value.hex()  # decoded with UNHEX() in the LOAD DATA statement
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+        .replace("\0", "\\0")
+    )
+
+
+class TweetWriter:
+    """
+    Inserts classified chunks into `table` using one of WRITERS. The
+    connection is opened by the first write(), so the writer may be created
+    on one thread and written from another, but calls must not overlap:
+    write() from one thread at a time, then finish() (or abort()) once after
+    the last write() has returned. Values of `binary_cols` are bytes (or None).
+    """
+
+    def __init__(self, cols, table="tweets", method=None, single_transaction=None, binary_cols=()):
+        config = current_app.config
+        self.cols = cols
+        self.binary_cols = set(binary_cols)
+        self.table = table
+        self.method = method or config.get("TWEET_WRITER", "executemany")
+        if self.method not in WRITERS:
+            raise ValueError(f"Unknown tweet writer '{self.method}', expected one of {WRITERS}")
+        if single_transaction is None:
+            single_transaction = config.get("TWEET_WRITER_SINGLE_TRANSACTION", False)
+        self.single_transaction = single_transaction
+        self.rows = 0
+        self.seconds = 0.0
+        self.conn = None
+
+    def _connection(self):
+        if self.conn is None:
+            if self.method == "loaddata":
+                self.conn = get_db_connection(allow_local_infile=True)
+            else:
+                self.conn = get_db_connection()
+            self.conn.autocommit = False
+        return self.conn
+
+    def _commit(self, final=False):
+        if final or not self.single_transaction:
+            self.conn.commit()
+
+    def write(self, values, after=None):
+        """
+        Insert a list of row tuples/lists ordered like self.cols. `after`, if
+        given, is called with the cursor before the chunk is committed, so
+        related writes (e.g. aggregate counters) land in the same transaction.
+        """
+        if not values:
+            return 0
+        t0 = time.time()
+        cursor = self._connection().cursor()
+        try:
+            if self.method == "loaddata":
+                try:
+                    self._load_data(cursor, values)
+                except mysql.connector.Error as e:
+                    if e.errno not in LOCAL_INFILE_ERRORS:
+                        raise
+                    print("⚠️ LOAD DATA LOCAL INFILE unavailable, falling back to executemany:", e)
+                    self.method = "executemany"
+                    self._executemany(cursor, values)
+            elif self.method == "multirow":
+                self._multirow(cursor, values)
+            else:
+                self._executemany(cursor, values)
+            if after is not None:
+                after(cursor)
+            self._commit()
+        finally:
+            cursor.close()
+        self.rows += len(values)
+        self.seconds += time.time() - t0
+        return len(values)
+
+    def _executemany(self, cursor, values):
+        placeholders = ", ".join(["%s"] * len(self.cols))
+        sql = f"INSERT INTO {self.table} ({', '.join(self.cols)}) VALUES ({placeholders})"
+        for start in range(0, len(values), EXECUTEMANY_BATCH):
+            if start:
+                self._commit()
+            cursor.executemany(sql, values[start:start + EXECUTEMANY_BATCH])
+
+    def _multirow(self, cursor, values):
+        head = f"INSERT INTO {self.table} ({', '.join(self.cols)}) VALUES "
+        row_sql = "(" + ", ".join(["%s"] * len(self.cols)) + ")"
+        batch, params, size = [], [], len(head)
+        for row in values:
+            # Rough byte estimate: text length plus quoting/escaping overhead
+            row_size = sum(len(str(v)) + 4 for v in row)
+            if batch and size + row_size > MULTIROW_MAX_BYTES:
+                cursor.execute(head + ", ".join(batch), params)
+                self._commit()
+                batch, params, size = [], [], len(head)
+            batch.append(row_sql)
+            params.extend(row)
+            size += row_size
+        if batch:
+            cursor.execute(head + ", ".join(batch), params)
+
+    def _load_data(self, cursor, values):
+        fd, path = tempfile.mkstemp(suffix=".tsv", prefix="tweets_")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8", newline="\n") as f:
+                for row in values:
+                    f.write("\t".join(_tsv_field(v) for v in row))
+                    f.write("\n")
+            sql_path = path.replace("\\", "/").replace("'", "\\'")
+            # Binary columns are written as hex into user variables
+            targets = [f"@{c}" if c in self.binary_cols else c for c in self.cols]
+            sets = [f"{c} = UNHEX(@{c})" for c in self.cols if c in self.binary_cols]
+            cursor.execute(
+                f"LOAD DATA LOCAL INFILE '{sql_path}' INTO TABLE {self.table} "
+                "CHARACTER SET utf8mb4 "
+                "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+                "LINES TERMINATED BY '\\n' "
+                f"({', '.join(targets)})"
+                + (f" SET {', '.join(sets)}" if sets else "")
+            )
+        finally:
+            os.remove(path)
+
+    @property
+    def rows_per_sec(self):
+        return round(self.rows / self.seconds, 1) if self.seconds else 0.0
+
+    def finish(self):
+        if self.conn is not None:
+            self.conn.commit()
+            self.conn.close()
+            self.conn = None
+
+    def abort(self):
+        if self.conn is not None:
+            try:
+                self.conn.rollback()
+            finally:
+                self.conn.close()
+                self.conn = None
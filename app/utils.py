@@ -2,20 +2,136 @@ import chardet
 import pandas as pd
 from io import StringIO
 import os
+import time
+import threading
+import weakref
 import mysql.connector
+from mysql.connector import pooling
 from flask import current_app
 
-def get_db_connection():
-    return mysql.connector.connect(
+# Process-wide connection pool, created lazily (and re-created after a fork).
+# mysql.connector's pool raises as soon as it is exhausted, so checkout retries
+# until MYSQL_POOL_TIMEOUT and records how often and how long callers waited.
+# Use connections as `with get_db_connection() as conn:` so every path hands
+# them back; one that is dropped without close() is returned when collected.
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+pool_stats = {"checkouts": 0, "in_use": 0, "waits": 0, "wait_seconds": 0.0, "timeouts": 0}
+
+def _release(cnx):
+    with _pool_lock:
+        pool_stats["in_use"] -= 1
+    try:
+        cnx.close()
+    except Exception as e:
+        print("⚠️ Could not return connection to the pool:", e)
+
+class PooledConnection:
+    """
+    Thin wrapper so close() (or leaving a `with` block) returns the connection
+    to the pool and updates stats. A wrapper garbage-collected without
+    close() still returns its connection.
+    """
+
+    def __init__(self, cnx):
+        object.__setattr__(self, "_cnx", cnx)
+        object.__setattr__(self, "_finalizer", weakref.finalize(self, _release, cnx))
+
+    def __getattr__(self, name):
+        return getattr(self._cnx, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._cnx, name, value)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def close(self):
+        # A finalizer runs at most once
+        self._finalizer()
+
+def _connect_args():
+    return dict(
         host=current_app.config['MYSQL_HOST'],
         user=current_app.config['MYSQL_USER'],
         password=current_app.config['MYSQL_PASSWORD'],
         database=current_app.config['MYSQL_DB'],
         connection_timeout=300,
         charset="utf8mb4",
-        use_unicode=True 
+        use_unicode=True
     )
 
+def _get_pool():
+    global _pool, _pool_pid
+    if _pool is None or _pool_pid != os.getpid():
+        with _pool_lock:
+            if _pool is None or _pool_pid != os.getpid():
+                _pool = pooling.MySQLConnectionPool(
+                    pool_name=f"myhatedetect_{os.getpid()}",
+                    pool_size=current_app.config.get('MYSQL_POOL_SIZE', 10),
+                    pool_reset_session=True,
+                    **_connect_args()
+                )
+                _pool_pid = os.getpid()
+    return _pool
+
+def get_db_connection(**options):
+    # Extra options (e.g. allow_local_infile=True) need a dedicated connection
+    if options:
+        return mysql.connector.connect(**_connect_args(), **options)
+
+    pool = _get_pool()
+    timeout = current_app.config.get('MYSQL_POOL_TIMEOUT', 30)
+    started = time.time()
+    waited = False
+    while True:
+        try:
+            cnx = pool.get_connection()
+            break
+        except pooling.PoolError:
+            if time.time() - started > timeout:
+                with _pool_lock:
+                    pool_stats["timeouts"] += 1
+                raise
+            waited = True
+            time.sleep(0.05)
+
+    # Reset on checkout: drop dead connections and roll back anything left open
+    try:
+        cnx.ping(reconnect=True, attempts=2, delay=0)
+        cnx.rollback()
+    except mysql.connector.Error:
+        try:
+            cnx.reconnect(attempts=2, delay=0)
+        except Exception:
+            # Hand the slot back to the pool, or every outage would leak one
+            try:
+                cnx.close()
+            except Exception:
+                pass
+            raise
+
+    with _pool_lock:
+        pool_stats["checkouts"] += 1
+        pool_stats["in_use"] += 1
+        if waited:
+            pool_stats["waits"] += 1
+            pool_stats["wait_seconds"] += time.time() - started
+    return PooledConnection(cnx)
+
+def get_pool_stats():
+    with _pool_lock:
+        stats = dict(pool_stats)
+    stats["pool_size"] = _pool.pool_size if _pool is not None else 0
+    stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+    stats["avg_wait_ms"] = round(stats["wait_seconds"] / stats["waits"] * 1000, 1) if stats["waits"] else 0.0
+    return stats
+
 def read_csv_with_encoding(filepath):
     try:
         # Detect file encoding first
@@ -33,18 +149,56 @@ def read_csv_with_encoding(filepath):
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in {'csv'}
 
-progress = {
-    "percent": 0,
-    "status": "idle"
-}
+# Upload progress is stored per job in the upload_jobs table, so every worker
+# process (and every gunicorn worker serving /upload_progress) sees the same state.
+PROGRESS_FIELDS = ("percent", "stage", "rows_done", "rows_total", "rows_per_sec", "eta_seconds")
+
+def set_progress(job_id, value, status="processing", **fields):
+    """
+    Record progress for a job. Extra keyword fields: stage (read/classify/
+    insert/export), rows_done, rows_total, rows_per_sec, eta_seconds.
+    """
+    fields = {k: v for k, v in fields.items() if k in PROGRESS_FIELDS}
+    fields["percent"] = int(value)
+    fields["message"] = status
+    assignments = ", ".join(f"{col} = %s" for col in fields)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"UPDATE upload_jobs SET {assignments} WHERE job_id = %s", list(fields.values()) + [job_id])
+        conn.commit()
+        cursor.close()
+
+def get_progress(job_id=None):
+    """Progress for one job, or for the most recently created job if job_id is None."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        sql = """SELECT job_id, status AS job_status, message, percent, stage, rows_done,
+                        rows_total, rows_per_sec, eta_seconds
+                 FROM upload_jobs"""
+        if job_id:
+            cursor.execute(sql + " WHERE job_id = %s", (job_id,))
+        else:
+            cursor.execute(sql + " ORDER BY created_at DESC LIMIT 1")
+        row = cursor.fetchone()
+        cursor.close()
 
-def set_progress(value, status="processing"):
-    progress["percent"] = value
-    progress["status"] = status
+    if not row:
+        return {"percent": 0, "status": "idle"}
+    row["status"] = row.pop("message") or row["job_status"]
+    return row
 
-def get_progress():
-    return progress
+def progress_rate(started_at, rows_done, rows_total=None):
+    """Return (rows per second, ETA in seconds or None) since started_at (time.time())."""
+    elapsed = max(time.time() - started_at, 1e-6)
+    rate = rows_done / elapsed
+    if not rows_total or rate <= 0:
+        return round(rate, 1), None
+    return round(rate, 1), int(max(rows_total - rows_done, 0) / rate)
 
-def reset_progress():
-    progress["percent"] = 0
-    progress["status"] = "idle"
+def estimate_rows(filepath):
+    """Cheap row estimate (line count minus header) used for ETA before parsing."""
+    lines = 0
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+    return max(lines - 1, 0)
@@ -0,0 +1,221 @@
+import hashlib
+import re
+import threading
+from collections import Counter, OrderedDict
+from io import BytesIO
+
+from app.utils import get_db_connection
+from app.tweet_stats import split_types, rebuild_tables, scan_tweets
+
+# Per-(month, hate label) word frequencies in tweet_word_counts, maintained by
+# the upload job (same transaction as the rows) and rebuilt with
+# `flask --app run rebuild-word-counts`. Stopwords are NOT removed at ingest so
+# the stopword list can change without a rebuild; they are dropped when the
+# counts for a month selection are merged.
+#
+# hate_type_word_counts holds the same kind of counters per (month, hate type)
+# for the hate-type page's top keywords, using that page's tokenization
+# (words of 3+ letters).
+#
+# Rendered word cloud PNGs are kept in a small in-process LRU keyed by
+# (months, label, stopword version, tweet count); the tweet count changes
+# whenever an upload adds rows for those months.
+
+TOKEN_RE = re.compile(r"\b[a-zA-Z]{2,}\b")
+MAX_WORD_LENGTH = 100  # tweet_word_counts.word is varchar(100)
+MAX_WORDS = 200        # WordCloud's default max_words
+
+WORD_TABLE = "tweet_word_counts"
+TYPE_WORD_TABLE = "hate_type_word_counts"
+
+UPSERT_SQL = """
+    INSERT INTO {table} (month, hate, word, word_count)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE word_count = word_count + VALUES(word_count)
+"""
+
+KEYWORD_RE = re.compile(r"\b[a-zA-Z]{3,}\b")
+
+TYPE_UPSERT_SQL = """
+    INSERT INTO {table} (month, hate_type, word, word_count)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE word_count = word_count + VALUES(word_count)
+"""
+
+
+def tokenize(text):
+    return [
+        w for w in TOKEN_RE.findall(str(text or "").lower())
+        if not w.startswith("http") and len(w) <= MAX_WORD_LENGTH
+    ]
+
+
+def count_words(months, hate_labels, tweets):
+    """Count (month, label, word) keys for parallel lists of classified rows."""
+    counts = Counter()
+    for month, label, tweet in zip(months, hate_labels, tweets):
+        for word in tokenize(tweet):
+            counts[(month, label, word)] += 1
+    return counts
+
+
+def count_type_words(months, hate_labels, hate_types, tweets):
+    """Count (month, hate type, keyword) keys over the hate rows of a chunk."""
+    counts = Counter()
+    for month, label, types, tweet in zip(months, hate_labels, hate_types, tweets):
+        if label != "hate":
+            continue
+        type_names = split_types(types)
+        if not type_names:
+            continue
+        words = [w for w in KEYWORD_RE.findall(str(tweet or "").lower()) if len(w) <= MAX_WORD_LENGTH]
+        for t in type_names:
+            for word in words:
+                counts[(month, t, word)] += 1
+    return counts
+
+
+def apply_word_counts(cursor, counts, type_counts=None, tables=None):
+    """
+    Add counts to tweet_word_counts (and hate_type_word_counts) in the
+    caller's transaction. `tables` maps those names to other tables to write to.
+    """
+    tables = tables or {}
+    if counts:
+        sql = UPSERT_SQL.format(table=tables.get(WORD_TABLE, WORD_TABLE))
+        cursor.executemany(sql, [key + (n,) for key, n in counts.items()])
+    if type_counts:
+        sql = TYPE_UPSERT_SQL.format(table=tables.get(TYPE_WORD_TABLE, TYPE_WORD_TABLE))
+        cursor.executemany(sql, [key + (n,) for key, n in type_counts.items()])
+
+
+def rebuild_word_counts(batch_size=50_000):
+    """
+    Recompute tweet_word_counts and hate_type_word_counts from the tweets
+    table (see tweet_stats.rebuild_tables). Returns the number of rows.
+    """
+    def fill(conn, staging):
+        cursor = conn.cursor()
+        for rows in scan_tweets(("month", "hate", "hate_types", "tweet"), batch_size):
+            months, labels, types, tweets = zip(*rows)
+            apply_word_counts(
+                cursor,
+                count_words(months, labels, tweets),
+                count_type_words(months, labels, types, tweets),
+                tables=staging
+            )
+            conn.commit()
+        cursor.close()
+
+    rebuild_tables([WORD_TABLE, TYPE_WORD_TABLE], fill)
+
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        total = 0
+        for table in (WORD_TABLE, TYPE_WORD_TABLE):
+            cursor.execute(f"SELECT COUNT(*) FROM {table}")
+            total += cursor.fetchone()[0]
+        cursor.close()
+    return total
+
+
+def fetch_frequencies(months, label, stop_words, max_words=MAX_WORDS):
+    """Top `max_words` non-stopword frequencies for `label` over `months`."""
+    if not months:
+        return {}
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        placeholder = ",".join(["%s"] * len(months))
+        # Over-fetch by the stopword count so filtering still leaves max_words
+        cursor.execute(f"""
+            SELECT word, SUM(word_count) AS n
+            FROM tweet_word_counts
+            WHERE hate = %s AND month IN ({placeholder})
+            GROUP BY word
+            ORDER BY n DESC
+            LIMIT %s
+        """, [label, *months, max_words + len(stop_words)])
+        rows = cursor.fetchall()
+        cursor.close()
+
+    freqs = {}
+    for word, n in rows:
+        if word not in stop_words:
+            freqs[word] = int(n)
+            if len(freqs) == max_words:
+                break
+    return freqs
+
+
+def top_type_keywords(months, stop_words, k=5):
+    """
+    Return {hate_type: [top k non-stopword keywords]} over `months` (all if
+    None), merged from hate_type_word_counts.
+    """
+    where, params = "", []
+    if months:
+        where = f"WHERE month IN ({','.join(['%s'] * len(months))})"
+        params = list(months)
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        # Rank per type in SQL; over-fetch by the stopword count so filtering still leaves k
+        cursor.execute(f"""
+            SELECT hate_type, word FROM (
+                SELECT hate_type, word,
+                       ROW_NUMBER() OVER (PARTITION BY hate_type ORDER BY SUM(word_count) DESC, word) AS rn
+                FROM hate_type_word_counts
+                {where}
+                GROUP BY hate_type, word
+            ) ranked
+            WHERE rn <= %s
+            ORDER BY hate_type, rn
+        """, params + [k + len(stop_words)])
+        rows = cursor.fetchall()
+        cursor.close()
+
+    keywords = {}
+    for hate_type, word in rows:
+        words = keywords.setdefault(hate_type, [])
+        if len(words) < k and word not in stop_words:
+            words.append(word)
+    return keywords
+
+
+def stopwords_version(stop_words):
+    return hashlib.sha1("\n".join(sorted(stop_words)).encode("utf-8")).hexdigest()[:12]
+
+
+_image_cache = OrderedDict()
+_image_lock = threading.Lock()
+image_cache_stats = {"hits": 0, "misses": 0}
+
+
+def render_wordcloud(months, label, stop_words, data_version, max_entries=32):
+    """
+    Return PNG bytes of the word cloud for `label` over `months`, or None if
+    there are no words. Results are cached (LRU, max_entries).
+    """
+    key = (tuple(sorted(months)), label, stopwords_version(stop_words), data_version)
+    with _image_lock:
+        if key in _image_cache:
+            _image_cache.move_to_end(key)
+            image_cache_stats["hits"] += 1
+            return _image_cache[key]
+        image_cache_stats["misses"] += 1
+
+    freqs = fetch_frequencies(months, label, stop_words)
+    png = None
+    if freqs:
+        from wordcloud import WordCloud
+
+        wc = WordCloud(background_color="white", width=400, height=200).generate_from_frequencies(freqs)
+        buffer = BytesIO()
+        wc.to_image().save(buffer, format="PNG")
+        png = buffer.getvalue()
+
+    with _image_lock:
+        _image_cache[key] = png
+        _image_cache.move_to_end(key)
+        while len(_image_cache) > max_entries:
+            _image_cache.popitem(last=False)
+    return png
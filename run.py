@@ -1,38 +1,108 @@
+import time
+_startup_t0 = time.perf_counter()
+
 import warnings
 warnings.filterwarnings("ignore", category=FutureWarning)
 
-from flask import Flask, render_template
-from app.routes import register_blueprints
 import os
+from threading import Thread
+
+UPLOAD_FOLDER = "upload_results"
+ALLOWED_EXTENSIONS = {'csv'}
 
-app = Flask(__name__, template_folder='app/templates', static_folder='app/static')
 
-# Secret key
-app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'a_default_dev_key')
+def create_app():
+    from flask import Flask, render_template
+    from app.routes import register_blueprints
+    from app.commands import register_commands
+    from app.jobs import register_job_queue
 
-# MySQL Config
-app.config['MYSQL_HOST'] = 'localhost'
-app.config['MYSQL_USER'] = 'root'
-app.config['MYSQL_PASSWORD'] = ''
-app.config['MYSQL_DB'] = 'myhatedetect'
+    print(f"⏱️ Startup imports took {time.perf_counter() - _startup_t0:.2f}s")
 
-# Upload folder
-UPLOAD_FOLDER = "upload_results"
-ALLOWED_EXTENSIONS = {'csv'}
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    app = Flask(__name__, template_folder='app/templates', static_folder='app/static')
+
+    # Secret key
+    app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'a_default_dev_key')
+
+    # MySQL Config
+    app.config['MYSQL_HOST'] = 'localhost'
+    app.config['MYSQL_USER'] = 'root'
+    app.config['MYSQL_PASSWORD'] = ''
+    app.config['MYSQL_DB'] = 'myhatedetect'
+    # Per-process connection pool (mysql.connector caps pool_size at 32)
+    app.config['MYSQL_POOL_SIZE'] = int(os.environ.get('MYSQL_POOL_SIZE', 10))
+    app.config['MYSQL_POOL_TIMEOUT'] = int(os.environ.get('MYSQL_POOL_TIMEOUT', 30))
+
+    # Upload folder
+    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+
+    # Upload job workers (uploads beyond this many wait in the queue)
+    app.config['UPLOAD_WORKERS'] = int(os.environ.get('UPLOAD_WORKERS', 1))
+
+    # How classified tweets are inserted: executemany (default), multirow or loaddata
+    # (LOAD DATA LOCAL INFILE; needs local_infile=ON on the server). With
+    # TWEET_WRITER_SINGLE_TRANSACTION=1 each file is committed once at the end.
+    app.config['TWEET_WRITER'] = os.environ.get('TWEET_WRITER', 'executemany')
+    app.config['TWEET_WRITER_SINGLE_TRANSACTION'] = os.environ.get('TWEET_WRITER_SINGLE_TRANSACTION') == '1'
+
+    # Processed results file written for each upload: csv (default), csv.gz or parquet (needs pyarrow)
+    app.config['EXPORT_FORMAT'] = os.environ.get('EXPORT_FORMAT', 'csv')
+
+    # Seconds the list of available months is cached per process (uploads in
+    # this process refresh it immediately)
+    app.config['MONTHS_CACHE_TTL'] = int(os.environ.get('MONTHS_CACHE_TTL', 300))
+
+    # Rendered overview word clouds kept in memory per process (LRU)
+    app.config['WORDCLOUD_CACHE_SIZE'] = int(os.environ.get('WORDCLOUD_CACHE_SIZE', 32))
+
+    # /classify API: texts per inference batch, and the cap on a JSON array body
+    # (the whole array is parsed in memory; larger inputs should stream NDJSON)
+    app.config['CLASSIFY_BATCH_SIZE'] = int(os.environ.get('CLASSIFY_BATCH_SIZE', 256))
+    app.config['CLASSIFY_MAX_TEXTS'] = int(os.environ.get('CLASSIFY_MAX_TEXTS', 1000))
+    # Key required in the X-API-Key header of /classify requests; unset leaves the API open
+    app.config['CLASSIFY_API_KEY'] = os.environ.get('CLASSIFY_API_KEY')
+    if not app.config['CLASSIFY_API_KEY']:
+        print("⚠️ CLASSIFY_API_KEY is not set; /classify accepts unauthenticated requests")
+    # Concurrent /classify requests are coalesced into one model batch of up to
+    # CLASSIFY_MAX_BATCH texts, waiting at most CLASSIFY_MAX_WAIT_MS for company
+    app.config['CLASSIFY_COALESCE'] = os.environ.get('CLASSIFY_COALESCE', '1') != '0'
+    app.config['CLASSIFY_MAX_BATCH'] = int(os.environ.get('CLASSIFY_MAX_BATCH', 64))
+    app.config['CLASSIFY_MAX_WAIT_MS'] = float(os.environ.get('CLASSIFY_MAX_WAIT_MS', 10))
+    app.config['CLASSIFY_MAX_QUEUE'] = int(os.environ.get('CLASSIFY_MAX_QUEUE', 1000))
+
+    # Register Blueprints
+    register_blueprints(app)
+
+    # CLI maintenance commands (flask --app run <command>)
+    register_commands(app)
+
+    # Upload job worker pool, started with the first request
+    register_job_queue(app)
+
+    # Models load lazily on the first prediction. Set WARMUP_MODELS=1 on classifier
+    # workers to load them in the background right after start-up instead.
+    if os.environ.get("WARMUP_MODELS") == "1":
+        from app.stage_predict import warm_up
+        Thread(target=warm_up, daemon=True).start()
+
+    # Error handlers
+    @app.errorhandler(404)
+    def not_found_error(error):
+        return render_template('error/404.html'), 404
+
+    @app.errorhandler(500)
+    def internal_error(error):
+        return render_template('error/500.html'), 500
 
-# Register Blueprints
-register_blueprints(app)
+    print(f"⏱️ App ready in {time.perf_counter() - _startup_t0:.2f}s")
+    return app
 
-# Error handlers
-@app.errorhandler(404)
-def not_found_error(error):
-    return render_template('error/404.html'), 404
 
-@app.errorhandler(500)
-def internal_error(error):
-    return render_template('error/500.html'), 500
+# Inference pool workers (app.inference_pool) re-import this module as
+# __mp_main__; they only need the models, so they skip building the web app.
+if __name__ != "__mp_main__":
+    app = create_app()
 
 # Run server
 if __name__ == "__main__":
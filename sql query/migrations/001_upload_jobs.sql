@@ -0,0 +1,20 @@
+-- Persistent upload job table for the background job queue (app/jobs.py).
+-- Apply to an existing database with:
+--   mysql -u root -p myhatedetect < "sql query/migrations/001_upload_jobs.sql"
+
+CREATE TABLE IF NOT EXISTS `upload_jobs` (
+  `job_id` char(32) NOT NULL,
+  `task` varchar(50) NOT NULL,
+  `file_path` varchar(500) NOT NULL,
+  `file_name` varchar(255) NOT NULL,
+  `month` varchar(50) DEFAULT NULL,
+  `priority` tinyint(4) NOT NULL DEFAULT 5,
+  `status` enum('queued','running','done','failed') NOT NULL DEFAULT 'queued',
+  `message` text DEFAULT NULL,
+  `worker` varchar(255) DEFAULT NULL,
+  `created_at` timestamp NOT NULL DEFAULT current_timestamp(),
+  `started_at` datetime DEFAULT NULL,
+  `finished_at` datetime DEFAULT NULL,
+  PRIMARY KEY (`job_id`),
+  KEY `status_priority` (`status`, `priority`, `created_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
@@ -0,0 +1,11 @@
+-- Per-job progress columns, replacing the in-process progress dict.
+-- Apply after 001_upload_jobs.sql.
+
+ALTER TABLE `upload_jobs`
+  ADD COLUMN `percent` tinyint(4) NOT NULL DEFAULT 0 AFTER `worker`,
+  ADD COLUMN `stage` varchar(20) DEFAULT NULL AFTER `percent`,
+  ADD COLUMN `rows_done` int(11) NOT NULL DEFAULT 0 AFTER `stage`,
+  ADD COLUMN `rows_total` int(11) DEFAULT NULL AFTER `rows_done`,
+  ADD COLUMN `rows_per_sec` float DEFAULT NULL AFTER `rows_total`,
+  ADD COLUMN `eta_seconds` int(11) DEFAULT NULL AFTER `rows_per_sec`,
+  ADD COLUMN `updated_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp();
@@ -0,0 +1,12 @@
+-- Pre-aggregated month x label x hate-type counts used by the dashboards.
+-- hate_type '' holds the number of tweets with that label in the month.
+-- After applying, fill it from existing tweets with:
+--   flask --app run rebuild-monthly-stats
+
+CREATE TABLE IF NOT EXISTS `tweet_monthly_stats` (
+  `month` varchar(50) NOT NULL,
+  `hate` enum('hate','non-hate') NOT NULL,
+  `hate_type` varchar(100) NOT NULL DEFAULT '',
+  `tweet_count` int(11) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`month`, `hate`, `hate_type`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
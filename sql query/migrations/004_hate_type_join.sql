@@ -0,0 +1,23 @@
+-- Normalized hate types: one row per type name plus a tweet <-> type join
+-- table, and composite indexes for the dashboards' month/label and the
+-- upload duplicate-check lookups.
+-- After applying, link existing tweets with:
+--   flask --app run backfill-hate-types
+
+CREATE TABLE IF NOT EXISTS `hate_type` (
+  `type_id` int(11) NOT NULL AUTO_INCREMENT,
+  `type_name` varchar(100) NOT NULL,
+  PRIMARY KEY (`type_id`),
+  UNIQUE KEY `type_name` (`type_name`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+CREATE TABLE IF NOT EXISTS `tweet_hate_type` (
+  `tweet_id` int(11) NOT NULL,
+  `type_id` int(11) NOT NULL,
+  PRIMARY KEY (`tweet_id`, `type_id`),
+  KEY `type_tweet` (`type_id`, `tweet_id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+ALTER TABLE `tweets`
+  ADD KEY IF NOT EXISTS `month_hate` (`month`, `hate`),
+  ADD KEY IF NOT EXISTS `file_month` (`file_name`, `month`);
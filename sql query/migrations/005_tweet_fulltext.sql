@@ -0,0 +1,7 @@
+-- FULLTEXT index used by the keyword search on the tweets view
+-- (MATCH(tweet, clean_tweet) AGAINST(... IN BOOLEAN MODE)).
+-- Building it on a large table takes a while and blocks writes; run it
+-- outside upload hours.
+
+ALTER TABLE `tweets`
+  ADD FULLTEXT KEY IF NOT EXISTS `tweet_text` (`tweet`, `clean_tweet`);
@@ -0,0 +1,12 @@
+-- Per-month word frequencies behind the overview word clouds (stopwords are
+-- filtered when the counts are read, not here).
+-- After applying, fill it from existing tweets with:
+--   flask --app run rebuild-word-counts
+
+CREATE TABLE IF NOT EXISTS `tweet_word_counts` (
+  `month` varchar(50) NOT NULL,
+  `hate` enum('hate','non-hate') NOT NULL,
+  `word` varchar(100) NOT NULL,
+  `word_count` int(11) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`month`, `hate`, `word`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
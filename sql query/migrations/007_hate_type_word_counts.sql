@@ -0,0 +1,12 @@
+-- Per-(month, hate type) keyword counters behind the hate-type page's top
+-- keywords (stopwords are filtered when the counts are read).
+-- After applying, fill it from existing tweets with:
+--   flask --app run rebuild-word-counts
+
+CREATE TABLE IF NOT EXISTS `hate_type_word_counts` (
+  `month` varchar(50) NOT NULL,
+  `hate_type` varchar(100) NOT NULL,
+  `word` varchar(100) NOT NULL,
+  `word_count` int(11) NOT NULL DEFAULT 0,
+  PRIMARY KEY (`month`, `hate_type`, `word`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
@@ -0,0 +1,17 @@
+-- Per-chunk checkpoints for resumable uploads. chunk_index -1 marks a job
+-- that passed the duplicate check; every other row is written in the same
+-- transaction as that chunk's tweets.
+
+CREATE TABLE IF NOT EXISTS `upload_checkpoints` (
+  `job_id` char(32) NOT NULL,
+  `chunk_index` int(11) NOT NULL,
+  `rows_done` int(11) NOT NULL DEFAULT 0,
+  `last_tweet_id` int(11) NOT NULL DEFAULT 0,
+  `export_offset` bigint(20) NOT NULL DEFAULT 0,
+  `created_at` timestamp NOT NULL DEFAULT current_timestamp(),
+  PRIMARY KEY (`job_id`, `chunk_index`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+-- Finds the previous job for a re-uploaded file
+ALTER TABLE `upload_jobs`
+  ADD KEY IF NOT EXISTS `file_month` (`file_name`, `month`, `created_at`);
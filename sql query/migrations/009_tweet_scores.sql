@@ -0,0 +1,10 @@
+-- Model scores kept with each tweet so thresholds and confidence views can be
+-- recomputed without re-running inference (see app/scores.py):
+--   hate_prob  - Stage 1 probability of "hate"
+--   type_probs - Stage 2 sigmoid scores for Race, Religion, Gender and
+--                Sexual_Orientation, packed as 4 little-endian float16 values
+-- Existing rows stay NULL until `flask --app run backfill-scores` is run.
+
+ALTER TABLE `tweets`
+  ADD COLUMN IF NOT EXISTS `hate_prob` float DEFAULT NULL,
+  ADD COLUMN IF NOT EXISTS `type_probs` binary(8) DEFAULT NULL;
@@ -0,0 +1,8 @@
+-- Whether the Malay toxic slang override matched a tweet (see app/scores.py).
+-- Such tweets are labelled hate whatever their hate_prob, so re-thresholding
+-- from stored scores must OR this in, e.g.
+--   SELECT COUNT(*) FROM tweets WHERE hate_prob >= 0.8 OR slang_override = 1
+-- Existing rows stay NULL until `flask --app run backfill-scores` is run.
+
+ALTER TABLE `tweets`
+  ADD COLUMN IF NOT EXISTS `slang_override` tinyint(1) DEFAULT NULL;
@@ -45,6 +45,19 @@ INSERT INTO `admin` (`admin_id`, `admin_email`, `admin_pwrd`, `temp_pwrd`, `firs
 
 -- --------------------------------------------------------
 
+--
+-- Table structure for table `hate_type_word_counts`
+--
+
+CREATE TABLE `hate_type_word_counts` (
+  `month` varchar(50) NOT NULL,
+  `hate_type` varchar(100) NOT NULL,
+  `word` varchar(100) NOT NULL,
+  `word_count` int(11) NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+-- --------------------------------------------------------
+
 --
 -- Table structure for table `policymaker`
 --
@@ -71,9 +84,103 @@ CREATE TABLE `tweets` (
   `hate_types` text NOT NULL,
   `month` varchar(50) NOT NULL,
   `file_name` varchar(255) NOT NULL,
+  `created_at` timestamp NOT NULL DEFAULT current_timestamp(),
+  `hate_prob` float DEFAULT NULL,
+  `type_probs` binary(8) DEFAULT NULL,
+  `slang_override` tinyint(1) DEFAULT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+-- --------------------------------------------------------
+
+--
+-- Table structure for table `hate_type`
+--
+
+CREATE TABLE `hate_type` (
+  `type_id` int(11) NOT NULL,
+  `type_name` varchar(100) NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+-- --------------------------------------------------------
+
+--
+-- Table structure for table `tweet_hate_type`
+--
+
+CREATE TABLE `tweet_hate_type` (
+  `tweet_id` int(11) NOT NULL,
+  `type_id` int(11) NOT NULL
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+-- --------------------------------------------------------
+
+--
+-- Table structure for table `tweet_monthly_stats`
+--
+
+CREATE TABLE `tweet_monthly_stats` (
+  `month` varchar(50) NOT NULL,
+  `hate` enum('hate','non-hate') NOT NULL,
+  `hate_type` varchar(100) NOT NULL DEFAULT '',
+  `tweet_count` int(11) NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+-- --------------------------------------------------------
+
+--
+-- Table structure for table `tweet_word_counts`
+--
+
+CREATE TABLE `tweet_word_counts` (
+  `month` varchar(50) NOT NULL,
+  `hate` enum('hate','non-hate') NOT NULL,
+  `word` varchar(100) NOT NULL,
+  `word_count` int(11) NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
+-- --------------------------------------------------------
+
+--
+-- Table structure for table `upload_checkpoints`
+--
+
+CREATE TABLE `upload_checkpoints` (
+  `job_id` char(32) NOT NULL,
+  `chunk_index` int(11) NOT NULL,
+  `rows_done` int(11) NOT NULL DEFAULT 0,
+  `last_tweet_id` int(11) NOT NULL DEFAULT 0,
+  `export_offset` bigint(20) NOT NULL DEFAULT 0,
   `created_at` timestamp NOT NULL DEFAULT current_timestamp()
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
 
+-- --------------------------------------------------------
+
+--
+-- Table structure for table `upload_jobs`
+--
+
+CREATE TABLE `upload_jobs` (
+  `job_id` char(32) NOT NULL,
+  `task` varchar(50) NOT NULL,
+  `file_path` varchar(500) NOT NULL,
+  `file_name` varchar(255) NOT NULL,
+  `month` varchar(50) DEFAULT NULL,
+  `priority` tinyint(4) NOT NULL DEFAULT 5,
+  `status` enum('queued','running','done','failed') NOT NULL DEFAULT 'queued',
+  `message` text DEFAULT NULL,
+  `worker` varchar(255) DEFAULT NULL,
+  `percent` tinyint(4) NOT NULL DEFAULT 0,
+  `stage` varchar(20) DEFAULT NULL,
+  `rows_done` int(11) NOT NULL DEFAULT 0,
+  `rows_total` int(11) DEFAULT NULL,
+  `rows_per_sec` float DEFAULT NULL,
+  `eta_seconds` int(11) DEFAULT NULL,
+  `created_at` timestamp NOT NULL DEFAULT current_timestamp(),
+  `started_at` datetime DEFAULT NULL,
+  `finished_at` datetime DEFAULT NULL,
+  `updated_at` timestamp NOT NULL DEFAULT current_timestamp() ON UPDATE current_timestamp()
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_general_ci;
+
 --
 -- Indexes for dumped tables
 --
@@ -85,6 +192,12 @@ ALTER TABLE `admin`
   ADD PRIMARY KEY (`admin_id`),
   ADD UNIQUE KEY `admin_email` (`admin_email`);
 
+--
+-- Indexes for table `hate_type_word_counts`
+--
+ALTER TABLE `hate_type_word_counts`
+  ADD PRIMARY KEY (`month`,`hate_type`,`word`);
+
 --
 -- Indexes for table `policymaker`
 --
@@ -96,7 +209,50 @@ ALTER TABLE `policymaker`
 -- Indexes for table `tweets`
 --
 ALTER TABLE `tweets`
-  ADD PRIMARY KEY (`tweet_id`);
+  ADD PRIMARY KEY (`tweet_id`),
+  ADD KEY `month_hate` (`month`,`hate`),
+  ADD KEY `file_month` (`file_name`,`month`),
+  ADD FULLTEXT KEY `tweet_text` (`tweet`,`clean_tweet`);
+
+--
+-- Indexes for table `hate_type`
+--
+ALTER TABLE `hate_type`
+  ADD PRIMARY KEY (`type_id`),
+  ADD UNIQUE KEY `type_name` (`type_name`);
+
+--
+-- Indexes for table `tweet_hate_type`
+--
+ALTER TABLE `tweet_hate_type`
+  ADD PRIMARY KEY (`tweet_id`,`type_id`),
+  ADD KEY `type_tweet` (`type_id`,`tweet_id`);
+
+--
+-- Indexes for table `tweet_monthly_stats`
+--
+ALTER TABLE `tweet_monthly_stats`
+  ADD PRIMARY KEY (`month`,`hate`,`hate_type`);
+
+--
+-- Indexes for table `tweet_word_counts`
+--
+ALTER TABLE `tweet_word_counts`
+  ADD PRIMARY KEY (`month`,`hate`,`word`);
+
+--
+-- Indexes for table `upload_checkpoints`
+--
+ALTER TABLE `upload_checkpoints`
+  ADD PRIMARY KEY (`job_id`,`chunk_index`);
+
+--
+-- Indexes for table `upload_jobs`
+--
+ALTER TABLE `upload_jobs`
+  ADD PRIMARY KEY (`job_id`),
+  ADD KEY `status_priority` (`status`,`priority`,`created_at`),
+  ADD KEY `file_month` (`file_name`,`month`,`created_at`);
 
 --
 -- AUTO_INCREMENT for dumped tables
@@ -114,6 +270,12 @@ ALTER TABLE `admin`
 ALTER TABLE `policymaker`
   MODIFY `pm_id` int(11) NOT NULL AUTO_INCREMENT;
 
+--
+-- AUTO_INCREMENT for table `hate_type`
+--
+ALTER TABLE `hate_type`
+  MODIFY `type_id` int(11) NOT NULL AUTO_INCREMENT;
+
 --
 -- AUTO_INCREMENT for table `tweets`
 --
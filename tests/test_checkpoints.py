@@ -0,0 +1,141 @@
+import sqlite3
+
+import pytest
+
+for module in ("pandas", "chardet", "flask", "mysql.connector"):
+    pytest.importorskip(module)
+
+from app import checkpoints  # noqa: E402
+
+SCHEMA = """
+    CREATE TABLE upload_jobs (job_id TEXT, file_name TEXT, month TEXT, status TEXT, created_at INTEGER);
+    CREATE TABLE upload_checkpoints (
+        job_id TEXT, chunk_index INTEGER, rows_done INTEGER, last_tweet_id INTEGER, export_offset INTEGER,
+        PRIMARY KEY (job_id, chunk_index)
+    );
+    CREATE TABLE tweets (tweet_id INTEGER PRIMARY KEY AUTOINCREMENT, file_name TEXT, month TEXT);
+"""
+
+
+class FakeCursor:
+    """Runs the module's MySQL statements on SQLite."""
+
+    def __init__(self, conn, dictionary=False):
+        self._cur = conn.cursor()
+        self.dictionary = dictionary
+
+    def execute(self, sql, params=()):
+        sql = sql.replace("%s", "?").replace("INSERT IGNORE", "INSERT OR IGNORE")
+        self._cur.execute(sql, params)
+
+    @property
+    def rowcount(self):
+        return self._cur.rowcount
+
+    def fetchone(self):
+        row = self._cur.fetchone()
+        if row is None or not self.dictionary:
+            return row
+        return dict(zip([d[0] for d in self._cur.description], row))
+
+    def close(self):
+        self._cur.close()
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self.db, dictionary)
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def db(monkeypatch):
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(SCHEMA)
+    monkeypatch.setattr(checkpoints, "get_db_connection", lambda: FakeConnection(conn))
+    return conn
+
+
+def add_job(db, job_id, status, created_at, file_name="a.csv", month="January 2024"):
+    db.execute("INSERT INTO upload_jobs VALUES (?, ?, ?, ?, ?)", (job_id, file_name, month, status, created_at))
+    db.commit()
+
+
+def commit_chunk(db, job_id, chunk_index, rows, rows_done, export_offset, checkpoint=True):
+    """Insert a chunk's tweets and (like the upload job) its checkpoint in one transaction."""
+    cur = FakeCursor(db)
+    for _ in range(rows):
+        cur.execute("INSERT INTO tweets (file_name, month) VALUES (%s, %s)", ("a.csv", "2024-01"))
+    if checkpoint:
+        last_id = db.execute("SELECT MAX(tweet_id) FROM tweets").fetchone()[0]
+        checkpoints.save_checkpoint(cur, job_id, chunk_index, rows_done, last_id, export_offset)
+    db.commit()
+
+
+def chunks_to_process(resume, n_chunks):
+    # Mirrors background_task's reader: chunks before chunks_done are skipped
+    return [i for i in range(n_chunks) if i >= resume["chunks_done"]]
+
+
+def test_new_job_has_no_resume_point(db):
+    add_job(db, "job1", "running", 1)
+    assert checkpoints.resume_point("job1", "a.csv", "January 2024") is None
+
+
+def test_start_marker_alone_resumes_from_the_first_chunk(db):
+    add_job(db, "job1", "running", 1)
+    checkpoints.mark_started("job1")
+    resume = checkpoints.resume_point("job1", "a.csv", "January 2024")
+    assert resume == {"chunks_done": 0, "rows_done": 0, "last_tweet_id": 0, "export_offset": 0}
+    assert chunks_to_process(resume, 3) == [0, 1, 2]
+
+
+def test_resume_skips_exactly_the_committed_chunks(db):
+    add_job(db, "job1", "running", 1)
+    checkpoints.mark_started("job1")
+    commit_chunk(db, "job1", 0, rows=3, rows_done=3, export_offset=100)
+    commit_chunk(db, "job1", 1, rows=2, rows_done=5, export_offset=180)
+    # Chunk 2 got some rows committed before the job died, but no checkpoint
+    commit_chunk(db, "job1", 2, rows=4, rows_done=9, export_offset=260, checkpoint=False)
+
+    resume = checkpoints.resume_point("job1", "a.csv", "January 2024")
+    assert resume == {"chunks_done": 2, "rows_done": 5, "last_tweet_id": 5, "export_offset": 180}
+    assert chunks_to_process(resume, 4) == [2, 3]
+
+    assert checkpoints.discard_uncommitted("a.csv", "2024-01", resume["last_tweet_id"]) == 4
+    assert db.execute("SELECT COUNT(*) FROM tweets").fetchone()[0] == 5
+
+
+def test_reupload_takes_over_checkpoints_of_a_failed_job(db):
+    add_job(db, "old", "failed", 1)
+    checkpoints.mark_started("old")
+    commit_chunk(db, "old", 0, rows=3, rows_done=3, export_offset=100)
+    add_job(db, "new", "running", 2)
+
+    resume = checkpoints.resume_point("new", "a.csv", "January 2024")
+    assert resume["chunks_done"] == 1 and resume["rows_done"] == 3
+    owners = {row[0] for row in db.execute("SELECT job_id FROM upload_checkpoints")}
+    assert owners == {"new"}
+
+
+def test_reupload_after_a_finished_job_starts_fresh(db):
+    add_job(db, "old", "done", 1)
+    checkpoints.mark_started("old")
+    commit_chunk(db, "old", 0, rows=3, rows_done=3, export_offset=100)
+    add_job(db, "new", "running", 2)
+
+    assert checkpoints.resume_point("new", "a.csv", "January 2024") is None
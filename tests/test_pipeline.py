@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+from app.pipeline import run_pipeline
+
+
+class Boom(Exception):
+    pass
+
+
+def pipeline_threads():
+    return [t for t in threading.enumerate() if t.name.startswith("pipeline-")]
+
+
+def test_items_flow_through_all_stages_in_order():
+    out = []
+    run_pipeline(range(20), [
+        ("double", lambda x: x * 2),
+        ("inc", lambda x: x + 1),
+        ("collect", out.append),
+    ])
+    assert out == [x * 2 + 1 for x in range(20)]
+
+
+@pytest.mark.parametrize("failing", ["first", "middle", "last"])
+def test_stage_error_stops_other_threads_and_is_reraised(failing):
+    seen = {"first": 0, "middle": 0, "last": 0}
+
+    def stage(name):
+        def work(x):
+            seen[name] += 1
+            if name == failing and x == 3:
+                raise Boom(name)
+            return x
+        return work
+
+    def source():
+        # Endless: only a stopped pipeline ends this test
+        n = 0
+        while True:
+            yield n
+            n += 1
+
+    with pytest.raises(Boom, match=failing):
+        run_pipeline(source(), [(name, stage(name)) for name in ("first", "middle", "last")], queue_size=1)
+
+    assert pipeline_threads() == []
+    # Later stages never saw items past the failure
+    assert seen["last"] <= 4
+
+
+def test_source_error_is_reraised():
+    def source():
+        yield 1
+        raise Boom("source")
+
+    out = []
+    with pytest.raises(Boom, match="source"):
+        run_pipeline(source(), [("collect", out.append)])
+    assert pipeline_threads() == []
+
+
+def test_app_context_is_entered_per_stage():
+    entered = []
+
+    class App:
+        def app_context(self):
+            class Ctx:
+                def __enter__(self):
+                    entered.append(threading.current_thread().name)
+
+                def __exit__(self, *exc):
+                    return False
+            return Ctx()
+
+    run_pipeline([1, 2], [("a", lambda x: x), ("b", lambda x: x)], app=App())
+    assert sorted(entered) == ["pipeline-a", "pipeline-b", "pipeline-read"]
@@ -0,0 +1,27 @@
+import pytest
+
+from app import prediction_cache
+
+
+@pytest.fixture(autouse=True)
+def cache(monkeypatch, tmp_path):
+    monkeypatch.setattr(prediction_cache, "CACHE_PATH", str(tmp_path / "predictions.sqlite3"))
+    monkeypatch.setattr(prediction_cache, "_conn", None)
+    monkeypatch.setattr(prediction_cache, "_touched", {})
+    monkeypatch.setattr(prediction_cache, "stats", {"hits": 0, "misses": 0})
+    yield
+    if prediction_cache._conn is not None:
+        prediction_cache._conn.close()
+
+
+def test_lookups_are_counted():
+    prediction_cache.put_many({"a": {"pred": 1}}, "v1")
+    assert prediction_cache.get_many(["a", "b"], "v1") == {"a": {"pred": 1}}
+    assert prediction_cache.get_stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_worker_lookups_are_added():
+    # What inference_pool does with the counts each worker shard returns
+    prediction_cache.get_many(["a"], "v1")
+    prediction_cache.record_lookups(3, 0)
+    assert prediction_cache.get_stats() == {"hits": 3, "misses": 1, "hit_rate": 0.75}
@@ -0,0 +1,75 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+for module in ("pandas", "chardet", "flask", "mysql.connector"):
+    pytest.importorskip(module)
+
+from app.scores import (  # noqa: E402
+    TYPE_ORDER, pack_type_probs, unpack_type_probs, score_columns, relabel,
+)
+
+
+def test_type_order_matches_stage_predict_labels():
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    from app.stage_predict import LABELS
+
+    assert list(TYPE_ORDER) == LABELS
+
+
+def test_pack_is_eight_bytes_and_none_stays_none():
+    probs = dict(zip(TYPE_ORDER, [0.9, 0.1, 0.5, 0.0]))
+    assert len(pack_type_probs(probs)) == 8
+    assert pack_type_probs(None) is None
+
+
+def test_float16_round_trip_with_none():
+    rows = [
+        dict(zip(TYPE_ORDER, [0.9123, 0.0001, 0.5, 1.0])),
+        None,
+        dict(zip(TYPE_ORDER, [0.0, 0.25, 0.75, 0.3333])),
+    ]
+    out = unpack_type_probs([pack_type_probs(r) for r in rows])
+
+    assert out.shape == (3, len(TYPE_ORDER))
+    assert out.dtype == np.float32
+    for i in (0, 2):
+        # float16 keeps about 3 significant digits
+        np.testing.assert_allclose(out[i], [rows[i][label] for label in TYPE_ORDER], atol=1e-3)
+    assert np.isnan(out[1]).all()
+
+
+def test_unpack_empty():
+    assert unpack_type_probs([]).shape == (0, len(TYPE_ORDER))
+
+
+def test_score_columns_and_relabel():
+    scores = [
+        {"hate_prob": 0.9, "type_probs": dict(zip(TYPE_ORDER, [0.8, 0.1, 0.6, 0.2])), "slang_override": False},
+        {"hate_prob": 0.2, "type_probs": None, "slang_override": False},
+    ]
+    hate_probs, blobs, slang = score_columns(scores)
+    assert hate_probs == [0.9, 0.2]
+    assert blobs[1] is None
+    assert slang == [0, 0]
+
+    hate, types = relabel(np.array(hate_probs, dtype=np.float32), unpack_type_probs(blobs))
+    assert hate.tolist() == [True, False]
+    assert types.tolist() == [[True, False, True, False], [False] * 4]
+
+    hate, types = relabel(np.array(hate_probs, dtype=np.float32), unpack_type_probs(blobs), type_threshold=0.7)
+    assert types[0].tolist() == [True, False, False, False]
+
+
+def test_relabel_keeps_slang_override_rows():
+    # The override made row 0 hate despite its low probability; Stage 2 still ran
+    hate_prob = np.array([0.1, 0.6, 0.3], dtype=np.float32)
+    type_probs = unpack_type_probs([pack_type_probs(dict(zip(TYPE_ORDER, [0.9, 0.1, 0.1, 0.1]))), None, None])
+    slang = np.array([True, False, False])
+
+    hate, types = relabel(hate_prob, type_probs, hate_threshold=0.8, slang_override=slang)
+    assert hate.tolist() == [True, False, False]
+    assert types[0].tolist() == [True, False, False, False]
+
+    hate, _ = relabel(hate_prob, type_probs, hate_threshold=0.8)
+    assert hate.tolist() == [False, False, False]
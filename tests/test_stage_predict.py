@@ -0,0 +1,94 @@
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from app import stage_predict  # noqa: E402
+from app.stage_predict import LABELS, _classify, _length_batches  # noqa: E402
+
+
+class FakeTokenizer:
+    """Text "wN wN ..." encodes to [N] * word count, so ids identify the input."""
+
+    def __call__(self, texts, truncation=True, max_length=None):
+        return {"input_ids": [[int(t.split()[0][1:])] * len(t.split()) for t in texts]}
+
+    def pad(self, encoded, return_tensors="pt"):
+        rows = encoded["input_ids"]
+        width = max(len(r) for r in rows)
+        ids = [r + [0] * (width - len(r)) for r in rows]
+        mask = [[1] * len(r) + [0] * (width - len(r)) for r in rows]
+        return {"input_ids": torch.tensor(ids), "attention_mask": torch.tensor(mask)}
+
+
+class FakeModel:
+    """Stage 1: even inputs are hate. Stage 2: type (N // 2) % 4 is set."""
+
+    def __init__(self, stage):
+        self.stage = stage
+        self.shapes = []
+
+    def __call__(self, input_ids, attention_mask):
+        self.shapes.append(tuple(input_ids.shape))
+        logits = []
+        for n in input_ids[:, 0].tolist():
+            if self.stage == 1:
+                logits.append([0.0, 3.0] if n % 2 == 0 else [3.0, 0.0])
+            else:
+                logits.append([3.0 if k == (n // 2) % 4 else -3.0 for k in range(len(LABELS))])
+
+        class Output:
+            pass
+        out = Output()
+        out.logits = torch.tensor(logits)
+        return out
+
+
+def fake_models():
+    tokenizer = FakeTokenizer()
+    return {
+        "stage1_model": FakeModel(1), "stage1_tokenizer": tokenizer,
+        "stage2_model": FakeModel(2), "stage2_tokenizer": tokenizer,
+        "shared_tokenizer": True, "backend": "torch",
+        "device": torch.device("cpu"), "fingerprint": "test",
+    }
+
+
+def test_length_batches_cover_every_index_once_within_budget():
+    lengths = [(i * 7) % 13 + 1 for i in range(40)]
+    batches = list(_length_batches(lengths, max_tokens=32))
+    assert sorted(i for b in batches for i in b) == list(range(40))
+    for b in batches:
+        assert len(b) * max(lengths[i] for i in b) <= 32 or len(b) == 1
+        assert [lengths[i] for i in b] == sorted(lengths[i] for i in b)
+
+
+def test_length_batches_respect_row_cap(monkeypatch):
+    monkeypatch.setattr(stage_predict, "MAX_BATCH_ROWS", 3)
+    batches = list(_length_batches([1] * 10, max_tokens=1000))
+    assert [len(b) for b in batches] == [3, 3, 3, 1]
+
+
+def test_classify_scatters_results_back_to_input_order():
+    lengths = [(i * 7) % 13 + 1 for i in range(30)]
+    texts = [" ".join([f"w{i}"] * n) for i, n in enumerate(lengths)]
+    models = fake_models()
+
+    preds, types, hate_probs, type_probs, slang_flags = _classify(texts, max_tokens=32, models=models)
+
+    assert not any(slang_flags)
+
+    assert preds == [1 if i % 2 == 0 else 0 for i in range(30)]
+    for i in range(30):
+        assert (hate_probs[i] > 0.5) == (i % 2 == 0)
+        if i % 2 == 0:
+            assert types[i] == [LABELS[(i // 2) % 4]]
+            assert max(range(4), key=lambda k: type_probs[i][k]) == (i // 2) % 4
+        else:
+            assert i not in types and i not in type_probs
+
+    # Batches were really packed by length under the token budget
+    for stage in (1, 2):
+        shapes = models[f"stage{stage}_model"].shapes
+        assert len(shapes) > 1
+        assert all(rows * width <= 32 or rows == 1 for rows, width in shapes)
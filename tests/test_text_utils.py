@@ -0,0 +1,125 @@
+import re
+
+import pytest
+
+pytest.importorskip("langdetect")
+pytest.importorskip("nltk")
+
+from app import text_utils  # noqa: E402
+
+
+def per_term_contains(text, terms):
+    """The original check: one regex search per dictionary entry."""
+    if not isinstance(text, str):
+        return False
+    text = re.sub(r"\s+", " ", text.lower()).strip()
+    return any(re.search(r"\b" + re.escape(t) + r"\b", text) for t in terms)
+
+
+@pytest.fixture
+def slang(monkeypatch):
+    """Replace the dictionary contents for one test and rebuild the matcher."""
+    original = set(text_utils.malaytoxicdict)
+
+    def use(terms):
+        text_utils.malaytoxicdict.clear()
+        text_utils.malaytoxicdict.update(terms)
+        text_utils.refresh_slang_matcher()
+
+    yield use
+    use(original)
+
+
+TERMS = {"babi", "cina babi", "bodoh", "bodoh piang", "gila", "fuk", "fuck"}
+
+TEXTS = [
+    "",
+    "hello world",
+    "Dasar BABI!",
+    "cina   babi betul",
+    "babirusa is an animal",
+    "kebabi",
+    "kau ni bodoh piang",
+    "bodohnya",
+    "gila-gila",
+    "what the fuck",
+    "fukushima",
+    "line\nbreak bodoh",
+    None,
+    123,
+]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_matches_per_term_loop(slang, text):
+    slang(TERMS)
+    assert text_utils.contains_malay_slang(text) == per_term_contains(text, TERMS)
+
+
+def test_batch_matches_single(slang):
+    slang(TERMS)
+    assert text_utils.contains_malay_slang_batch(TEXTS) == [text_utils.contains_malay_slang(t) for t in TEXTS]
+
+
+def test_real_dictionary_matches_per_term_loop():
+    terms = set(text_utils.malaytoxicdict)
+    for text in TEXTS + ["eh butoh uh babi", "kepala bana", "Bodoh Kimak Lancau Sial"]:
+        assert text_utils.contains_malay_slang(text) == per_term_contains(text, terms)
+
+
+def test_overlapping_and_prefix_terms_are_all_reported(slang):
+    slang(TERMS)
+    assert text_utils.find_malay_slang("cina babi") == ["cina babi", "babi"]
+    assert text_utils.find_malay_slang("bodoh piang, bodoh") == ["bodoh piang", "bodoh"]
+
+
+def test_shorter_terms_at_the_same_position_are_reported(slang):
+    slang(TERMS)
+    assert text_utils.find_malay_slang("kau bodoh piang") == ["bodoh piang", "bodoh"]
+    assert text_utils.find_malay_slang("Cina Babi") == ["cina babi", "babi"]
+
+
+@pytest.mark.parametrize("text", TEXTS)
+def test_reports_every_term_the_per_term_loop_finds(slang, text):
+    slang(TERMS)
+    expected = {t for t in TERMS if per_term_contains(text, [t])}
+    found = text_utils.find_malay_slang(text)
+    assert set(found) == expected
+    assert len(found) == len(set(found))
+
+
+def test_multi_word_terms_across_whitespace(slang):
+    slang(TERMS)
+    assert text_utils.find_malay_slang("CINA\t\tBABI") == ["cina babi", "babi"]
+    assert text_utils.find_malay_slang("cina") == []
+
+
+def test_word_boundaries(slang):
+    slang(TERMS)
+    assert text_utils.find_malay_slang("babirusa kebabi fukushima") == []
+    assert text_utils.find_malay_slang("(babi)") == ["babi"]
+
+
+def test_empty_dictionary(slang):
+    slang(set())
+    assert text_utils.contains_malay_slang("babi") is False
+    assert text_utils.find_malay_slang("babi") == []
+
+
+def test_refresh_after_same_size_edit(slang):
+    slang({"babi"})
+    assert text_utils.contains_malay_slang("babi")
+
+    # Same size: not picked up by the staleness check until refreshed
+    text_utils.malaytoxicdict.clear()
+    text_utils.malaytoxicdict.add("gila")
+    assert text_utils.contains_malay_slang("gila") is False
+    text_utils.refresh_slang_matcher()
+    assert text_utils.contains_malay_slang("gila")
+    assert text_utils.contains_malay_slang("babi") is False
+
+
+def test_size_change_rebuilds_automatically(slang):
+    slang({"babi"})
+    text_utils.malaytoxicdict.add("gila")
+    assert text_utils.contains_malay_slang("gila")
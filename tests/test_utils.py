@@ -0,0 +1,60 @@
+import gc
+
+import pytest
+
+for module in ("pandas", "chardet", "flask", "mysql.connector"):
+    pytest.importorskip(module)
+
+from app import utils  # noqa: E402
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = 0
+
+    def close(self):
+        self.closed += 1
+
+
+@pytest.fixture(autouse=True)
+def in_use(monkeypatch):
+    monkeypatch.setitem(utils.pool_stats, "in_use", 0)
+
+
+def checkout(cnx):
+    # What get_db_connection does after taking cnx from the pool
+    utils.pool_stats["in_use"] += 1
+    return utils.PooledConnection(cnx)
+
+
+def test_with_block_returns_connection_once():
+    cnx = FakeConnection()
+    with checkout(cnx) as conn:
+        pass
+    conn.close()
+    assert cnx.closed == 1
+    assert utils.pool_stats["in_use"] == 0
+
+
+def test_with_block_returns_connection_on_early_return():
+    cnx = FakeConnection()
+
+    def handler():
+        with checkout(cnx):
+            return "redirect"
+
+    assert handler() == "redirect"
+    assert cnx.closed == 1
+
+
+def test_abandoned_connection_is_returned_when_collected():
+    cnx = FakeConnection()
+
+    def leaky_handler():
+        checkout(cnx)
+        return "redirect"
+
+    leaky_handler()
+    gc.collect()
+    assert cnx.closed == 1
+    assert utils.pool_stats["in_use"] == 0